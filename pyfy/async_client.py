@@ -4,6 +4,7 @@ except:  # noqa: E722
     import json
 import logging
 import asyncio
+from collections import OrderedDict
 from concurrent.futures._base import TimeoutError
 
 from aiohttp import (
@@ -16,19 +17,34 @@ from aiohttp import (
 import backoff
 
 from .creds import ClientCreds, _set_empty_user_creds_if_none
-from .excs import ApiError, AuthError, _TooManyRequests
-from .utils import _safe_getitem
+from .excs import ApiError, AuthError, _TooManyRequests, _ServerError
+from .utils import (
+    _safe_getitem,
+    _merge_json_responses,
+    _json_loads,
+    _RemainingPageRequests,
+)
 from .wrappers import (
+    _check_library_snapshot,
+    _update_library_snapshot,
     _dispatch_request,
     _set_and_get_me_attr_async,
     _default_to_locale,
     _inject_user_id,
 )
-from .base_client import _BaseClient, TOKEN_EXPIRED_MSG
+from .base_client import (
+    _BaseClient,
+    TOKEN_EXPIRED_MSG,
+    DEFAULT_HEADERS,
+    RETRY_STATUS_CODES,
+    IDEMPOTENT_METHODS,
+)
 
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+
+ETAG_CACHE_MAXSIZE = 512  # Max GET responses kept for conditional requests
+KEEPALIVE_TIMEOUT = 75  # Seconds an idle connection is kept open for reuse
 
 
 class AsyncSpotify(_BaseClient):
@@ -80,12 +96,40 @@ class AsyncSpotify(_BaseClient):
             * Sets user_creds info from Spotify to client's user_creds object. e.g. country.
 
             * Default: True
+
+        cache (bool):
+
+            * Whether or not to cache GET responses and revalidate them with Spotify's ETags
+
+            * Default: True
         
         max_connections (int):
         
             * Max TCP connections per host from the same session
 
             * Default: 1000
+
+        cache_ttl (float):
+
+            * Seconds a GET response is served from memory instead of requesting it again. Requests that change a resource e.g. PUT /me/following drop the cached responses of that resource
+
+            * Default: None (disabled)
+
+        cache_maxsize (int):
+
+            * Max responses kept in memory when cache_ttl is set
+
+            * Default: 256
+
+        library_snapshot (bool):
+
+            * Answers owns_tracks, owns_albums and follows_artists from the IDs of the user's saved tracks, saved albums and followed artists
+
+            * Each is fetched once, when first checked, then kept up to date by this client's save, delete, follow and unfollow methods
+
+            * Pass force_network=True to a check to ask Spotify instead
+
+            * Default: False
     """
 
     IS_ASYNC = True
@@ -103,14 +147,21 @@ class AsyncSpotify(_BaseClient):
         default_to_locale=True,
         populate_user_creds=True,
         max_connections=1000,
+        cache=True,
+        cache_ttl=None,
+        cache_maxsize=256,
+        library_snapshot=False,
     ):
 
         # unsupported session settings
-        cache = None
         ensure_user_auth = None
 
         self.proxy_auth = proxy_auth
         self.max_connections = max_connections
+        # (url, authorization header) -> (etag, response body)
+        self._etag_cache = OrderedDict()
+        # Session kept open by ``async with``. Otherwise, each call opens and closes its own
+        self._http_session = None
 
         super().__init__(
             access_token,
@@ -124,6 +175,9 @@ class AsyncSpotify(_BaseClient):
             default_to_locale,
             cache,
             populate_user_creds,
+            cache_ttl,
+            cache_maxsize,
+            library_snapshot,
         )
 
     async def populate_user_creds(self):
@@ -135,6 +189,19 @@ class AsyncSpotify(_BaseClient):
         if me:
             self._populate_user_creds(me)
 
+    async def _library_ids(self, kind):
+        """ IDs of the user's library of a kind e.g. "track". Pages through all of it the first time """
+        ids = self._library_snapshot.get(kind)
+        if ids is None:
+            ids = set()
+            request = self._prep_library_snapshot(kind)
+            while request is not None:
+                page = (await self._send_authorized_requests(request)).json
+                page_ids, request = self._library_snapshot_page(kind, page)
+                ids.update(page_ids)
+            self._library_snapshot[kind] = ids
+        return ids
+
     def _create_session(
         self, cache=None, proxies=None, backoff_factor=None, max_retries=None
     ):
@@ -150,12 +217,41 @@ class AsyncSpotify(_BaseClient):
     def _tcp_connector(self):
         # NOTE: limit_per_host (int) – limit for simultaneous connections to the same endpoint. Endpoints are the same if they are have equal (host, port, is_ssl) triple.
         return TCPConnector(
-            limit_per_host=self.max_connections, enable_cleanup_closed=True
+            limit_per_host=self.max_connections,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True,
         )
 
     @property
     def _session(self):
-        return ClientSession(json_serialize=json.dumps, connector=self._tcp_connector)
+        return ClientSession(
+            json_serialize=json.dumps,
+            connector=self._tcp_connector,
+            headers=DEFAULT_HEADERS,
+        )
+
+    async def __aenter__(self):
+        """
+        Keeps one HTTP session, and its pool of kept-alive connections, open for all the calls made inside the block::
+
+            async with AsyncSpotify(access_token) as spt:
+                me = await spt.me()
+                playlists = await spt.user_playlists()
+        """
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = self._session
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the HTTP session opened by ``async with``
+        """
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
 
     async def _gather(self, *coros, return_exceptions, refresh_first):
         if refresh_first is True:
@@ -163,18 +259,42 @@ class AsyncSpotify(_BaseClient):
         requests = [
             await coro for coro in coros
         ]  # To return their request model, not an actual response
-        for request in requests:
-            if "headers" not in request:
-                raise TypeError(
-                    'Invalid requests batch. Maybe you forgot to set "to_gather" to True?'
-                )
+        # Requests with too many IDs come as a list of requests. Flatten them then merge their responses back
+        batches = [req if isinstance(req, list) else [req] for req in requests]
+        for batch in batches:
+            for request in batch:
+                if "headers" not in request:
+                    raise TypeError(
+                        'Invalid requests batch. Maybe you forgot to set "to_gather" to True?'
+                    )
+                self._invalidate_cached_responses(request)
         responses = await self._send_authorized_requests(
-            *requests, return_gather_exceptions=return_exceptions, gather=True
+            *[request for batch in batches for request in batch],
+            return_gather_exceptions=return_exceptions,
+            gather=True
         )
         json_responses = [
             getattr(response, "json", response) for response in responses
         ]  # Return JSON res else response object
-        return json_responses
+
+        merged_responses, i = [], 0
+        for request, batch in zip(requests, batches):
+            batch_responses = json_responses[i : i + len(batch)]
+            i += len(batch)
+            if not isinstance(request, list):
+                merged_responses.append(batch_responses[0])
+                continue
+            exceptions = [r for r in batch_responses if isinstance(r, Exception)]
+            if exceptions:
+                merged_responses.append(exceptions[0])
+            elif isinstance(request, _RemainingPageRequests):
+                pages = _merge_json_responses(batch_responses) if batch else None
+                merged_responses.append(
+                    self._merge_remaining_pages(request.response, pages)
+                )
+            else:
+                merged_responses.append(_merge_json_responses(batch_responses))
+        return merged_responses
 
     async def gather(self, *coros, return_exceptions=False, refresh_first=False):
         """ 
@@ -244,7 +364,7 @@ class AsyncSpotify(_BaseClient):
         self, *reqs, return_gather_exceptions=False, gather=False
     ):
         if (
-            getattr(self._caller, "access_is_expired", None) is True
+            self._caller_access_is_expired is True
         ):  # True if expired and None if there's no expiry set
             await self._refresh_token()
 
@@ -255,20 +375,30 @@ class AsyncSpotify(_BaseClient):
         )
 
     async def _send_requests(self, *reqs, return_gather_exceptions=False, gather=False):
+        if self._http_session is not None and not self._http_session.closed:
+            return await self._send_requests_with_session(
+                self._http_session, reqs, return_gather_exceptions, gather
+            )
         async with self._session as sess:
-            if gather is True:
-                tasks = [
-                    asyncio.ensure_future(self._send_request_with_backoff(req, sess))
-                    for req in reqs
-                ]
-                results = await asyncio.gather(
-                    *tasks, return_exceptions=return_gather_exceptions
-                )
-            elif gather is False:
-                results = await self._send_request_with_backoff(reqs[0], sess)
-            else:
-                await sess.close()
-                raise ValueError("Gather must be either True or False")
+            return await self._send_requests_with_session(
+                sess, reqs, return_gather_exceptions, gather
+            )
+
+    async def _send_requests_with_session(
+        self, sess, reqs, return_gather_exceptions, gather
+    ):
+        if gather is True:
+            tasks = [
+                asyncio.ensure_future(self._send_request_with_backoff(req, sess))
+                for req in reqs
+            ]
+            results = await asyncio.gather(
+                *tasks, return_exceptions=return_gather_exceptions
+            )
+        elif gather is False:
+            results = await self._send_request_with_backoff(reqs[0], sess)
+        else:
+            raise ValueError("Gather must be either True or False")
         return results
 
     async def _send_request_with_backoff(self, req, sess):
@@ -279,6 +409,7 @@ class AsyncSpotify(_BaseClient):
             wait_gen=lambda: backoff.expo(factor=self.backoff_factor),
             exception=(
                 _TooManyRequests,
+                _ServerError,
                 TimeoutError,
                 ClientConnectionError,
             ),  # Aiohttp exception hierarchy: https://docs.aiohttp.org/en/stable/client_reference.html?highlight=exceptions#hierarchy-of-exceptions
@@ -288,9 +419,17 @@ class AsyncSpotify(_BaseClient):
 
     async def _handle_send_requests(self, sess, r):
         logger.debug(r.url)
+        headers = r.get("headers")
+        etag_key, cached = None, None
+        if self.cache and r.get("method") == "GET":
+            # https://developer.spotify.com/documentation/web-api/#conditional-requests
+            etag_key = (r.get("url"), headers.get("Authorization"))
+            cached = self._etag_cache.get(etag_key)
+            if cached is not None:
+                headers = {**headers, "If-None-Match": cached[0]}
         res = await sess.request(
             url=r.get("url"),
-            headers=r.get("headers"),
+            headers=headers,
             data=r.get("data"),
             json=r.get("json"),
             method=r.get("method"),
@@ -302,8 +441,18 @@ class AsyncSpotify(_BaseClient):
             res.status_code = res.status
             if res.status_code == 204:
                 res.json = {}
+            elif res.status_code == 304 and cached is not None:
+                # Parse the stored body again rather than handing out a shared dict
+                self._etag_cache.move_to_end(etag_key)
+                res.json = _json_loads(cached[1]) if cached[1] else {}
             else:
-                res.json = await res.json(content_type=None) or {}
+                res.json = await res.json(content_type=None, loads=_json_loads) or {}
+                if (
+                    etag_key is not None
+                    and res.status_code == 200
+                    and "ETag" in res.headers
+                ):
+                    self._cache_etag(etag_key, res.headers["ETag"], await res.text())
         try:
             res.raise_for_status()
         except TimeoutError as e:
@@ -311,14 +460,11 @@ class AsyncSpotify(_BaseClient):
             raise e
         except ClientResponseError as e:
             if res.status_code == 401:  # Automatically refresh and resend request
-                if (
-                    res.json.get("error", None).get("message", None)
-                    == TOKEN_EXPIRED_MSG
-                ):
+                if _safe_getitem(res.json, "error", "message") == TOKEN_EXPIRED_MSG:
                     old_auth_header = r["headers"]["Authorization"]
                     await self._refresh_token()  # Should either raise an error or refresh the token
                     new_auth_header = self._access_authorization_header
-                    if new_auth_header == old_auth_header:
+                    if new_auth_header["Authorization"] == old_auth_header:
                         msg = "refresh_token() was successfully called but token wasn't refreshed. Execution stopped to avoid infinite looping."
                         logger.critical(msg)
                         raise RuntimeError(msg)
@@ -333,7 +479,16 @@ class AsyncSpotify(_BaseClient):
                 msg = _safe_getitem(res.json, "error", "message") or _safe_getitem(
                     res.json, "error_description"
                 )
+                await self._wait_retry_after(res)
                 raise _TooManyRequests(msg=msg, http_response=res, http_request=r, e=e)
+            elif (
+                res.status_code in RETRY_STATUS_CODES
+                and r.get("method") in IDEMPOTENT_METHODS
+            ):  # Transient server error, retried like a 429
+                msg = _safe_getitem(res.json, "error", "message") or _safe_getitem(
+                    res.json, "error_description"
+                )
+                raise _ServerError(msg=msg, http_response=res, http_request=r, e=e)
             else:
                 msg = _safe_getitem(res.json, "error", "message") or _safe_getitem(
                     res.json, "error_description"
@@ -342,6 +497,21 @@ class AsyncSpotify(_BaseClient):
         else:
             return res
 
+    async def _wait_retry_after(self, res):
+        """ Waits as long as Spotify asked to in the Retry-After header of a 429. Never longer than the client's timeout """
+        try:
+            retry_after = float(res.headers.get("Retry-After", 0))
+        except ValueError:
+            return
+        if retry_after > 0:
+            await asyncio.sleep(min(retry_after, self.timeout))
+
+    def _cache_etag(self, key, etag, body):
+        self._etag_cache[key] = (etag, body)
+        self._etag_cache.move_to_end(key)
+        if len(self._etag_cache) > ETAG_CACHE_MAXSIZE:
+            self._etag_cache.popitem(last=False)
+
     @_dispatch_request
     async def _check_authorization(self):
         """
@@ -1518,6 +1688,7 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    @_check_library_snapshot("track")
     @_dispatch_request
     async def owns_tracks(self, *args, **kwargs):
         """
@@ -1537,6 +1708,12 @@ class AsyncSpotify(_BaseClient):
 
                 * Default: ``False``
 
+            force_network (bool):
+
+                * Asks Spotify even if library_snapshot is enabled
+
+                * Default: False
+
         Returns:
 
             dict:
@@ -1547,6 +1724,7 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("track", added=True)
     @_dispatch_request
     async def save_tracks(self, *args, **kwargs):
         """
@@ -1566,6 +1744,12 @@ class AsyncSpotify(_BaseClient):
 
                 * Default: ``False``
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1576,6 +1760,7 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("track", added=False)
     @_dispatch_request
     async def delete_tracks(self, *args, **kwargs):
         """
@@ -1594,6 +1779,12 @@ class AsyncSpotify(_BaseClient):
 
                 * Default: ``False``
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1667,6 +1858,7 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    @_check_library_snapshot("artist")
     @_dispatch_request
     async def follows_artists(self, *args, **kwargs):
         """
@@ -1686,6 +1878,12 @@ class AsyncSpotify(_BaseClient):
 
                 * Default: ``False``
 
+            force_network (bool):
+
+                * Asks Spotify even if library_snapshot is enabled
+
+                * Default: False
+
         Returns:
 
             dict:
@@ -1696,6 +1894,7 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("artist", added=True)
     @_dispatch_request
     async def follow_artists(self, *args, **kwargs):
         """
@@ -1715,6 +1914,12 @@ class AsyncSpotify(_BaseClient):
 
                 * Default: ``False``
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1725,6 +1930,7 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("artist", added=False)
     @_dispatch_request
     async def unfollow_artists(self, *args, **kwargs):
         """
@@ -1744,6 +1950,12 @@ class AsyncSpotify(_BaseClient):
 
                 * Default: ``False``
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1886,6 +2098,7 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    @_check_library_snapshot("album")
     @_dispatch_request
     async def owns_albums(self, *args, **kwargs):
         """
@@ -1905,6 +2118,12 @@ class AsyncSpotify(_BaseClient):
 
                 * Default: ``False``
 
+            force_network (bool):
+
+                * Asks Spotify even if library_snapshot is enabled
+
+                * Default: False
+
         Returns:
 
             dict:
@@ -1915,6 +2134,7 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("album", added=True)
     @_dispatch_request
     async def save_albums(self, *args, **kwargs):
         """
@@ -1934,6 +2154,12 @@ class AsyncSpotify(_BaseClient):
 
                 * Default: ``False``
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1944,6 +2170,7 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("album", added=False)
     @_dispatch_request
     async def delete_albums(self, *args, **kwargs):
         """
@@ -1963,6 +2190,12 @@ class AsyncSpotify(_BaseClient):
 
                 * Default: ``False``
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -2358,6 +2591,51 @@ class AsyncSpotify(_BaseClient):
         """
         return args, kwargs
 
+    async def remaining_pages(self, response, **kwargs):
+        """
+        Remaining Pages
+
+        Fetches all the pages that come after an offset based paging object and appends their items to its own
+
+        Note:
+
+            * All pages are requested concurrently
+
+            * Cursor based paging objects e.g. the ones of followed artists can only be walked through with next_page
+
+        Arguments:
+
+            response (dict):
+
+                * Paging object i.e. a response that has items, offset, limit, total and next keys
+
+                * Required
+
+            to_gather (bool):
+
+                * Whether or not this resource/method will be gathered with ``AsyncSpotify.gather`` or ``AsyncSpotify.gather_now``
+
+                * Optional
+
+                * Default: ``False``
+
+        Returns:
+
+            dict: The paging object passed holding every item from its offset on. Its next is None
+
+        Raises:
+
+            pyfy.excs.ApiError:
+        """
+        pages = await self._remaining_pages(response, **kwargs)
+        if kwargs.get("to_gather") is True:
+            return _RemainingPageRequests(pages or [], response)
+        return self._merge_remaining_pages(response, pages)
+
+    @_dispatch_request
+    async def _remaining_pages(self, *args, **kwargs):
+        return args, kwargs
+
     ##### Personalization & Explore
 
     @_dispatch_request
@@ -4,18 +4,24 @@ except:  # noqa: E722
     import json
 import base64
 import warnings
+import time
 import datetime
-from urllib.parse import urlencode
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import urlencode, urlsplit, parse_qsl
 
 from requests import Request
 
+from .__version__ import __version__
 from .creds import ClientCreds, UserCreds, _set_empty_client_creds_if_none
 from .excs import ApiError, AuthError
 from .utils import (
     _get_key_recursively,
     _build_full_url,
+    _TTLCache,
     _safe_comma_join_list,
-    _is_single_json_type,
+    _chunk_ids,
+    _valid_ids,
     _Dict,
 )
 
@@ -24,6 +30,127 @@ TOKEN_EXPIRED_MSG = "The access token expired"  # Msg sent back when token is ex
 BASE_URI = "https://api.spotify.com/v1"
 OAUTH_TOKEN_URL = "https://accounts.spotify.com/api/token"
 OAUTH_AUTHORIZE_URL = "https://accounts.spotify.com/authorize"
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "pyfy/" + __version__,
+}  # Set once on the session instead of on every request
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)  # Too many requests and transient server errors
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE", "HEAD", "OPTIONS")
+
+# Roots of the endpoints that are addressed by ID
+CATEGORIES_URI = BASE_URI + "/browse/categories"
+ALBUMS_URI = BASE_URI + "/albums"
+ARTISTS_URI = BASE_URI + "/artists"
+TRACKS_URI = BASE_URI + "/tracks"
+PLAYLISTS_URI = BASE_URI + "/playlists"
+USERS_URI = BASE_URI + "/users"
+AUDIO_FEATURES_URI = BASE_URI + "/audio-features"
+AUDIO_ANALYSIS_URI = BASE_URI + "/audio-analysis"
+
+# Endpoints without IDs in their path
+ME_URI = BASE_URI + "/me"
+PLAYER_URI = ME_URI + "/player"
+PLAYER_DEVICES_URI = PLAYER_URI + "/devices"
+PLAYER_PLAY_URI = PLAYER_URI + "/play"
+PLAYER_PAUSE_URI = PLAYER_URI + "/pause"
+PLAYER_NEXT_URI = PLAYER_URI + "/next"
+PLAYER_PREVIOUS_URI = PLAYER_URI + "/previous"
+PLAYER_REPEAT_URI = PLAYER_URI + "/repeat"
+PLAYER_SEEK_URI = PLAYER_URI + "/seek"
+PLAYER_SHUFFLE_URI = PLAYER_URI + "/shuffle"
+PLAYER_VOLUME_URI = PLAYER_URI + "/volume"
+PLAYER_QUEUE_URI = PLAYER_URI + "/queue"
+CURRENTLY_PLAYING_URI = PLAYER_URI + "/currently-playing"
+RECENTLY_PLAYED_URI = PLAYER_URI + "/recently-played"
+ME_PLAYLISTS_URI = ME_URI + "/playlists"
+ME_TRACKS_URI = ME_URI + "/tracks"
+ME_TRACKS_CONTAINS_URI = ME_TRACKS_URI + "/contains"
+ME_ALBUMS_URI = ME_URI + "/albums"
+ME_ALBUMS_CONTAINS_URI = ME_ALBUMS_URI + "/contains"
+ME_FOLLOWING_URI = ME_URI + "/following"
+ME_FOLLOWING_CONTAINS_URI = ME_FOLLOWING_URI + "/contains"
+TOP_TRACKS_URI = ME_URI + "/top/tracks"
+TOP_ARTISTS_URI = ME_URI + "/top/artists"
+FEATURED_PLAYLISTS_URI = BASE_URI + "/browse/featured-playlists"
+NEW_RELEASES_URI = BASE_URI + "/browse/new-releases"
+SEARCH_URI = BASE_URI + "/search"
+RECOMMENDATIONS_URI = BASE_URI + "/recommendations"
+GENRE_SEEDS_URI = RECOMMENDATIONS_URI + "/available-genre-seeds"
+CHECK_AUTHORIZATION_URI = (
+    SEARCH_URI
+    + "?"
+    + urlencode(dict(q="Hey spotify am I authorized", type="artist"))
+)
+
+# Max IDs Spotify accepts per request. Longer lists are split into several requests.
+MAX_ALBUM_IDS = 20
+MAX_ARTIST_IDS = 50
+MAX_TRACK_IDS = 50
+MAX_AUDIO_FEATURES_IDS = 100
+MAX_FOLLOW_IDS = 50
+
+# Query parameters of the recommendations endpoint, in the order they are encoded
+_RECOMMENDATIONS_PARAMS = (
+    "limit",
+    "market",
+    "seed_artists",
+    "seed_genres",
+    "seed_tracks",
+    "min_acousticness",
+    "max_acousticness",
+    "target_acousticness",
+    "min_danceability",
+    "max_danceability",
+    "target_danceability",
+    "min_duration_ms",
+    "max_duration_ms",
+    "target_duration_ms",
+    "min_energy",
+    "max_energy",
+    "target_energy",
+    "min_instrumentalness",
+    "max_instrumentalness",
+    "target_instrumentalness",
+    "min_key",
+    "max_key",
+    "target_key",
+    "min_liveness",
+    "max_liveness",
+    "target_liveness",
+    "min_loudness",
+    "max_loudness",
+    "target_loudness",
+    "min_mode",
+    "max_mode",
+    "target_mode",
+    "min_popularity",
+    "max_popularity",
+    "target_popularity",
+    "min_speechiness",
+    "max_speechiness",
+    "target_speechiness",
+    "min_tempo",
+    "max_tempo",
+    "target_tempo",
+    "min_time_signature",
+    "max_time_signature",
+    "target_time_signature",
+    "min_valence",
+    "max_valence",
+    "target_valence",
+)
+
+
+@lru_cache(maxsize=32)
+def _auth_uri_without_state(client_id, scopes, redirect_uri, show_dialog, response_type):
+    """ Everything in the OAuth2 URI but the state only changes when the client creds do """
+    params = {
+        "client_id": client_id,
+        "response_type": response_type,
+        "scope": " ".join(scopes),
+        "show_dialog": json.dumps(show_dialog),
+    }
+    return f"{OAUTH_AUTHORIZE_URL}?redirect_uri={redirect_uri}&{urlencode(params)}"
 
 
 class _BaseClient:
@@ -32,6 +159,10 @@ class _BaseClient:
     Implements data parsing, building requests and almost all functionality that does not require any IO
     """
 
+    _FORM_URLENCODED = MappingProxyType(
+        {"Content-Type": "application/x-www-form-urlencoded"}
+    )
+
     def __init__(
         self,
         access_token,
@@ -45,6 +176,9 @@ class _BaseClient:
         default_to_locale,
         cache,
         populate_user_creds,
+        cache_ttl,
+        cache_maxsize,
+        library_snapshot,
     ):
         """
         Arguments:
@@ -66,11 +200,22 @@ class _BaseClient:
             default_to_locale: Will pass methods decorated with @_default_to_locale the user's locale if available.
             
             cache: Whether or not to cache HTTP requests for the user
+
+            cache_ttl: Seconds GET responses are served from memory without a request. None disables it
+
+            cache_maxsize: Max responses kept in memory when cache_ttl is set
+
+            library_snapshot: Whether or not to answer owns_tracks, owns_albums and follows_artists from the IDs of the user's whole library, fetched once
         """
 
         # Credentials models
         self.client_creds = client_creds
 
+        # Authorization headers memoized as (credentials they were built from, header)
+        self._access_header_cache = (None, None)
+        self._client_header_cache = (None, None)
+        self._expiry_ts_cache = (None, None)
+
         # Request defaults
         self.timeout = timeout
 
@@ -79,6 +224,11 @@ class _BaseClient:
         self.proxies = proxies
         self.backoff_factor = backoff_factor
         self.cache = cache
+        self._response_cache = (
+            _TTLCache(cache_ttl, cache_maxsize) if cache_ttl else None
+        )
+        # kind e.g. "track" -> set of the IDs in the user's library. Filled lazily
+        self._library_snapshot = {} if library_snapshot else None
         sess = self._create_session(max_retries, proxies, backoff_factor, cache)
         if sess is not None:
             self._session = sess
@@ -126,7 +276,7 @@ class _BaseClient:
             raise AuthError("No client credentials set")
 
         data = {"grant_type": "client_credentials"}
-        headers = self._client_authorization_header
+        headers = dict(self._client_authorization_header)
         return self._create_request(
             method="POST", url=OAUTH_TOKEN_URL, headers=headers, data=data
         )
@@ -140,10 +290,8 @@ class _BaseClient:
             "grant_type": "refresh_token",
             "refresh_token": self.user_creds.refresh_token,
         }
-        headers = {
-            **self._client_authorization_header,
-            **self._form_url_encoded_type_header,
-        }
+        headers = dict(self._client_authorization_header)
+        headers.update(self._FORM_URLENCODED)
         return self._create_request(
             method="POST", url=OAUTH_TOKEN_URL, headers=headers, data=data
         )
@@ -154,10 +302,8 @@ class _BaseClient:
             "code": grant,
             "redirect_uri": self.client_creds.redirect_uri,
         }
-        headers = {
-            **self._client_authorization_header,
-            **self._form_url_encoded_type_header,
-        }
+        headers = dict(self._client_authorization_header)
+        headers.update(self._FORM_URLENCODED)
         return self._create_request(
             method="POST", url=OAUTH_TOKEN_URL, headers=headers, data=data
         )
@@ -168,12 +314,12 @@ class _BaseClient:
 
     @user_creds.setter
     def user_creds(self, user_creds):
-        # Refresh session for each sync user (To avoid cache collision. Not likely. just a precaution).
+        # Drop the HTTP cache for each sync user (To avoid cache collision. Not likely. just a precaution).
+        # The session itself is kept, so its pooled connections don't have to be opened again.
         if self.IS_ASYNC is False:  # Only if sync.
-            self._session.close()
-            self._session = self._create_session(
-                self.max_retries, self.proxies, self.backoff_factor, self.cache
-            )
+            self._clear_http_cache()
+        if self._library_snapshot is not None:
+            self._library_snapshot.clear()
 
         # Set user
         self._user_creds = user_creds
@@ -239,28 +385,23 @@ class _BaseClient:
         show_dialog = show_dialog or self.client_creds.show_dialog or False
         response_type = response_type or "code"
 
-        params = {
-            "client_id": client_id,
-            "response_type": response_type,
-            "scope": " ".join(scopes_list),
-            "show_dialog": json.dumps(show_dialog),
-        }
-        params = urlencode(params)
-        uri = f"{OAUTH_AUTHORIZE_URL}?redirect_uri={redirect_uri}&{params}"
+        uri = _auth_uri_without_state(
+            client_id, tuple(scopes_list), redirect_uri, show_dialog, response_type
+        )
         if state is not None:
             uri += f"&state={state}"
         return uri
 
     def _update_user_creds_with(self, user_creds_object):
-        for key, value in user_creds_object.__dict__.items():
-            if value is not None:
-                setattr(self.user_creds, key, value)
+        self.user_creds.__dict__.update(
+            {k: v for k, v in user_creds_object.__dict__.items() if v is not None}
+        )
 
     @_set_empty_client_creds_if_none
     def _update_client_creds_with(self, client_creds_object):
-        for key, value in client_creds_object.__dict__.items():
-            if value is not None:
-                setattr(self.client_creds, key, value)
+        self.client_creds.__dict__.update(
+            {k: v for k, v in client_creds_object.__dict__.items() if v is not None}
+        )
 
     @staticmethod
     def _user_json_to_object(json_response):
@@ -281,26 +422,25 @@ class _BaseClient:
         )
         return creds
 
-    @property
-    def _json_content_type_header(self):
-        return {"Content-Type": "application/json"}
-
-    @property
-    def _form_url_encoded_type_header(self):
-        return {"Content-Type": "application/x-www-form-urlencoded"}
-
     @property
     def _client_authorization_header(self):
         if self.client_creds.client_id and self.client_creds.client_secret:
-            # Took me a whole day to figure out that the colon is supposed to be encoded :'(
-            utf_header = (
-                self.client_creds.client_id + ":" + self.client_creds.client_secret
-            )
-            return {
-                "Authorization": "Basic {}".format(
-                    base64.b64encode(utf_header.encode()).decode()
+            key = (self.client_creds.client_id, self.client_creds.client_secret)
+            cached_key, header = self._client_header_cache
+            if header is None or cached_key != key:
+                # Took me a whole day to figure out that the colon is supposed to be encoded :'(
+                utf_header = (
+                    self.client_creds.client_id + ":" + self.client_creds.client_secret
                 )
-            }
+                header = MappingProxyType(
+                    {
+                        "Authorization": "Basic {}".format(
+                            base64.b64encode(utf_header.encode()).decode()
+                        )
+                    }
+                )
+                self._client_header_cache = (key, header)
+            return header
         else:
             raise AttributeError(
                 "No client credentials found to make an authorization header"
@@ -316,16 +456,96 @@ class _BaseClient:
     @property
     def _access_authorization_header(self):
         if self._caller is not None:
-            return {"Authorization": "Bearer {}".format(self._caller.access_token)}
+            access_token = self._caller.access_token
+            cached_token, header = self._access_header_cache
+            if header is None or cached_token != access_token:
+                header = MappingProxyType(
+                    {"Authorization": "Bearer {}".format(access_token)}
+                )
+                self._access_header_cache = (access_token, header)
+            return header
         else:
             raise ApiError(
                 msg="Call Requires an authorized caller, either client or user. Call either authorize_client_creds() or set a user creds object."
             )
 
-    def _create_request(self, method, url, headers={}, data=None, json=None):
+    def clear_cache(self):
+        """ Drops all the responses cached because of ``cache_ttl`` """
+        if self._response_cache is not None:
+            self._response_cache.clear()
+
+    def _cached_response(self, request, authorized_request):
+        """
+        Returns the key to cache the response of a request under and the response if it's already cached.
+        Requests other than GETs aren't cached, instead they invalidate the responses of the resource they change
+        """
+        if self._response_cache is None:
+            return None, None
+        if request.method != "GET":
+            self._invalidate_cached_responses(request)
+            return None, None
+        key = (
+            request.url,
+            self._access_authorization_header["Authorization"]
+            if authorized_request
+            else None,
+        )
+        return key, self._response_cache.get(key)
+
+    def _invalidate_cached_responses(self, request):
+        if self._response_cache is not None and request.method != "GET":
+            self._response_cache.invalidate(request.url)
+
+    def _cache_response(self, key, request, json_res):
+        if key is not None and json_res:
+            self._response_cache.set(key, request.url, json_res)
+
+    def _prep_library_snapshot(self, kind):
+        """ Request of the first page of the user's saved tracks, saved albums or followed artists """
+        url, params = _LIBRARY_SNAPSHOT_PAGES[kind]
+        return self._create_request(method="GET", url=url, params=params)
+
+    def _library_snapshot_page(self, kind, page):
+        """ Returns the IDs in a page of the user's library and the request of the next page (None if last) """
+        if kind == "artist":
+            page = page["artists"]  # Cursor based paging
+            ids = [artist["id"] for artist in page["items"]]
+        else:
+            ids = [item[kind]["id"] for item in page["items"]]  # Saved items wrap them
+        if page.get("next"):
+            return ids, self._create_request(method="GET", url=page["next"])
+        return ids, None
+
+    @property
+    def _caller_access_is_expired(self):
+        """
+        Same as the caller's access_is_expired, but compares a cached POSIX timestamp of the expiry against time.time()
+        instead of building a new datetime for every request
+        """
+        expiry = getattr(self._caller, "expiry", None)
+        if not isinstance(expiry, datetime.datetime):
+            return None  # No expiry set
+        cached_expiry, expiry_ts = self._expiry_ts_cache
+        if cached_expiry is not expiry:
+            if expiry.tzinfo is None:  # Naive expiries are in UTC
+                expiry = expiry.replace(tzinfo=datetime.timezone.utc)
+            expiry_ts = expiry.timestamp()
+            self._expiry_ts_cache = (self._caller.expiry, expiry_ts)
+        return expiry_ts <= time.time()
+
+    def _create_request(
+        self, method, url, headers=None, data=None, json=None, params=None
+    ):
+        """ Builds the request for the client, with the query params encoded into the URL. Headers are never shared between requests """
+        if params:
+            url = _build_full_url(url, params)
         if self.IS_ASYNC is False:
             return Request(
-                method=method, headers=headers, url=url, data=data, json=json
+                method=method,
+                headers=headers or {},
+                url=url,
+                data=data,
+                json=json if json else None,  # An empty dict would still be sent as a "{}" body
             )
         elif self.IS_ASYNC is True:
             return _Dict(
@@ -338,13 +558,24 @@ class _BaseClient:
                 json=json if json else None,
             )
 
+    def _create_batched_request(self, method, url, ids, max_ids, **params):
+        """ Returns a list of requests instead of a single one if there are more than `max_ids` IDs """
+        if params.get("type") != "user":  # User IDs are usernames, they have no fixed format
+            ids = _valid_ids(ids)
+        if isinstance(ids, (list, tuple)) and len(ids) > max_ids:
+            return [
+                self._create_request(
+                    method=method,
+                    url=url,
+                    params=dict(params, ids=_safe_comma_join_list(chunk)),
+                )
+                for chunk in _chunk_ids(ids, max_ids)
+            ]
+        params["ids"] = _safe_comma_join_list(ids)
+        return self._create_request(method=method, url=url, params=params)
+
     def _prep__check_authorization(self):
-        test_url = (
-            BASE_URI
-            + "/search?"
-            + urlencode(dict(q="Hey spotify am I authorized", type="artist"))
-        )
-        return self._create_request(method="GET", url=test_url)
+        return self._create_request(method="GET", url=CHECK_AUTHORIZATION_URI)
 
     def _populate_user_creds(self, me):
         for k, v in me.items():
@@ -354,9 +585,8 @@ class _BaseClient:
     ##### Playback
 
     def _prep_devices(self, **kwargs):
-        url = BASE_URI + "/me/player/devices"
-        params = dict()
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        url = PLAYER_DEVICES_URI
+        return self._create_request(method="GET", url=url)
 
     def _prep_play(
         self,
@@ -370,7 +600,7 @@ class _BaseClient:
         position_ms=None,
         **kwargs,
     ):
-        url = BASE_URI + "/me/player/play"
+        url = PLAYER_PLAY_URI
         params, data = dict(device_id=device_id), {}
 
         if track_ids:
@@ -403,103 +633,100 @@ class _BaseClient:
         #        'position_ms': position_ms
         #    }
 
-        return self._create_request(
-            method="PUT", url=_build_full_url(url, params), json=data
-        )
+        return self._create_request(method="PUT", url=url, params=params, json=data)
 
     def _prep_pause(self, device_id=None, **kwargs):
-        url = BASE_URI + "/me/player/pause"
+        url = PLAYER_PAUSE_URI
         params = dict(device_id=device_id)
-        return self._create_request(method="PUT", url=_build_full_url(url, params))
+        return self._create_request(method="PUT", url=url, params=params)
 
     def _prep_currently_playing(self, market=None, **kwargs):
-        url = BASE_URI + "/me/player/currently-playing"
+        url = CURRENTLY_PLAYING_URI
         params = dict(market=market)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_currently_playing_info(self, market=None, **kwargs):
-        url = BASE_URI + "/me/player"
+        url = PLAYER_URI
         params = dict(market=market)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_recently_played_tracks(
         self, limit=None, after=None, before=None, **kwargs
     ):
-        url = BASE_URI + "/me/player/recently-played"
+        url = RECENTLY_PLAYED_URI
         params = dict(type="track", limit=limit, after=after, before=before)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_next(self, device_id=None, **kwargs):
-        url = BASE_URI + "/me/player/next"
+        url = PLAYER_NEXT_URI
         params = dict(device_id=device_id)
-        return self._create_request(method="POST", url=_build_full_url(url, params))
+        return self._create_request(method="POST", url=url, params=params)
 
     def _prep_previous(self, device_id=None, **kwargs):
-        url = BASE_URI + "/me/player/previous"
+        url = PLAYER_PREVIOUS_URI
         params = dict(device_id=device_id)
-        return self._create_request(method="POST", url=_build_full_url(url, params))
+        return self._create_request(method="POST", url=url, params=params)
 
     def _prep_repeat(self, state="context", device_id=None, **kwargs):
-        url = BASE_URI + "/me/player/repeat"
+        url = PLAYER_REPEAT_URI
         params = dict(state=state, device_id=device_id)
-        return self._create_request(method="PUT", url=_build_full_url(url, params))
+        return self._create_request(method="PUT", url=url, params=params)
 
     def _prep_seek(self, position_ms, device_id=None, **kwargs):
-        url = BASE_URI + "/me/player/seek"
+        url = PLAYER_SEEK_URI
         params = dict(position_ms=position_ms, device_id=device_id)
-        return self._create_request(method="PUT", url=_build_full_url(url, params))
+        return self._create_request(method="PUT", url=url, params=params)
 
     def _prep_shuffle(self, state=True, device_id=None, **kwargs):
-        url = BASE_URI + "/me/player/shuffle"
+        url = PLAYER_SHUFFLE_URI
         params = dict(state=state, device_id=device_id)
-        return self._create_request(method="PUT", url=_build_full_url(url, params))
+        return self._create_request(method="PUT", url=url, params=params)
 
     def _prep_playback_transfer(self, device_ids, **kwargs):
-        url = BASE_URI + "/me/player"
-        params = {}
-        data = dict(device_ids=_safe_comma_join_list(device_ids))
-        return self._create_request(
-            method="PUT", url=_build_full_url(url, params), json=data
-        )
+        url = PLAYER_URI
+        if isinstance(device_ids, str):
+            device_ids = [device_ids]
+        data = dict(device_ids=list(device_ids))  # A JSON array, not comma separated
+        return self._create_request(method="PUT", url=url, json=data)
 
     def _prep_volume(self, volume_percent, device_id=None, **kwargs):
-        url = BASE_URI + "/me/player/volume"
+        url = PLAYER_VOLUME_URI
         params = dict(volume_percent=volume_percent, device_id=device_id)
-        return self._create_request(method="PUT", url=_build_full_url(url, params))
+        return self._create_request(method="PUT", url=url, params=params)
 
     def _prep_queue(self, track_id, device_id=None, **kwargs):
-        url = BASE_URI + "/me/player/queue"
+        url = PLAYER_QUEUE_URI
         track_uri = "spotify:track:" + track_id
         params = dict(uri=track_uri, device_id=device_id)
-        return self._create_request(method="POST", url=_build_full_url(url, params))
+        return self._create_request(method="POST", url=url, params=params)
 
     ##### Playlists
 
     def _prep_playlist(self, playlist_id, market=None, fields=None, **kwargs):
-        url = BASE_URI + "/playlists/" + playlist_id
+        url = f"{PLAYLISTS_URI}/{playlist_id}"
         params = dict(market=market, fields=fields)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_user_playlists(self, user_id=None, limit=None, offset=None, **kwargs):
         if user_id is None:
             return self._prep__user_playlists(limit=limit, offset=offset)
-        url = BASE_URI + "/users/" + user_id + "/playlists"
+        url = f"{USERS_URI}/{user_id}/playlists"
         params = dict(limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep__user_playlists(self, limit=None, offset=None, **kwargs):
-        url = BASE_URI + "/me/playlists"
+        url = ME_PLAYLISTS_URI
         params = dict(limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_follows_playlist(
         self, playlist_id, user_ids=None, user_id=None, **kwargs
     ):
         if user_ids is None:
             user_ids = user_id
-        url = BASE_URI + "/playlists/" + playlist_id + "/followers/contains"
+        url = f"{PLAYLISTS_URI}/{playlist_id}/followers/contains"
         params = dict(ids=_safe_comma_join_list(user_ids))
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_create_playlist(
         self,
@@ -510,8 +737,7 @@ class _BaseClient:
         user_id=None,
         **kwargs,
     ):
-        url = BASE_URI + "/users/" + user_id + "/playlists"
-        params = {}
+        url = f"{USERS_URI}/{user_id}/playlists"
         data = dict(name=name)
 
         if description is not None:
@@ -521,19 +747,12 @@ class _BaseClient:
         if collaborative is not None:
             data["collaborative"] = collaborative
 
-        return self._create_request(
-            method="POST", url=_build_full_url(url, params), json=data
-        )
+        return self._create_request(method="POST", url=url, json=data)
 
     def _prep_follow_playlist(self, playlist_id, public=None, **kwargs):
-        url = BASE_URI + "/playlists/" + playlist_id + "/followers"
-        params = {}
-        data = {}
-        if public is not None:
-            data["public"] = public
-        return self._create_request(
-            method="PUT", url=_build_full_url(url, params), json=data
-        )
+        url = f"{PLAYLISTS_URI}/{playlist_id}/followers"
+        data = {"public": public} if public is not None else None
+        return self._create_request(method="PUT", url=url, json=data)
 
     def _prep_update_playlist(
         self,
@@ -544,8 +763,7 @@ class _BaseClient:
         collaborative=False,
         **kwargs,
     ):
-        url = BASE_URI + "/playlists/" + playlist_id
-        params = {}
+        url = f"{PLAYLISTS_URI}/{playlist_id}"
         data = {}
         if name is not None:
             data["name"] = name
@@ -556,14 +774,11 @@ class _BaseClient:
         if collaborative is not None:
             data["collaborative"] = collaborative
 
-        return self._create_request(
-            method="PUT", url=_build_full_url(url, params), json=data
-        )
+        return self._create_request(method="PUT", url=url, json=data)
 
     def _prep_unfollow_playlist(self, playlist_id, **kwargs):
-        url = BASE_URI + "/playlists/" + playlist_id + "/followers"
-        params = {}
-        return self._create_request(method="DELETE", url=_build_full_url(url, params))
+        url = f"{PLAYLISTS_URI}/{playlist_id}/followers"
+        return self._create_request(method="DELETE", url=url)
 
     def _prep_delete_playlist(self, playlist_id, **kwargs):
         """ an alias to unfollow_playlist"""
@@ -574,24 +789,22 @@ class _BaseClient:
     def _prep_playlist_tracks(
         self, playlist_id, market=None, fields=None, limit=None, offset=None, **kwargs
     ):
-        url = BASE_URI + "/playlists/" + playlist_id + "/tracks"
+        url = f"{PLAYLISTS_URI}/{playlist_id}/tracks"
         params = dict(market=market, fields=fields, limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_add_playlist_tracks(
         self, playlist_id, track_ids, position=None, **kwargs
     ):
-        url = BASE_URI + "/playlists/" + playlist_id + "/tracks"
+        url = f"{PLAYLISTS_URI}/{playlist_id}/tracks"
 
         # convert IDs to uris. WHY SPOTIFY :(( ?
-        if type(track_ids) == str:
+        if isinstance(track_ids, str):
             track_ids = [track_ids]
-        new_list = []
-        for track_id in track_ids:
-            new_list.append("spotify:track:" + track_id)
+        new_list = ["spotify:track:" + track_id for track_id in track_ids]
 
         params = dict(position=position, uris=_safe_comma_join_list(new_list))
-        return self._create_request(method="POST", url=_build_full_url(url, params))
+        return self._create_request(method="POST", url=url, params=params)
 
     def _prep_reorder_playlist_track(
         self,
@@ -601,8 +814,7 @@ class _BaseClient:
         insert_before=None,
         **kwargs,
     ):
-        url = BASE_URI + "/playlists/" + playlist_id + "/tracks"
-        params = {}
+        url = f"{PLAYLISTS_URI}/{playlist_id}/tracks"
         data = {}
 
         if range_start is not None:
@@ -612,13 +824,10 @@ class _BaseClient:
         if insert_before is not None:
             data["insert_before"] = insert_before
 
-        return self._create_request(
-            method="PUT", url=_build_full_url(url, params), json=data
-        )
+        return self._create_request(method="PUT", url=url, json=data)
 
     def _prep_replace_playlist_tracks(self, playlist_id, track_ids=None, **kwargs):
-        url = BASE_URI + "/playlists/" + playlist_id + "/tracks"
-        params = {}
+        url = f"{PLAYLISTS_URI}/{playlist_id}/tracks"
         data = {}
 
         if track_ids is not None:
@@ -630,9 +839,7 @@ class _BaseClient:
                 raise TypeError("Invalid track_ids type")
             data["uris"] = uris
 
-        return self._create_request(
-            method="PUT", url=_build_full_url(url, params), json=data
-        )
+        return self._create_request(method="PUT", url=url, json=data)
 
     def _prep_delete_playlist_tracks(self, playlist_id, track_ids, **kwargs):
         """ 
@@ -654,17 +861,16 @@ class _BaseClient:
         ]
         """
         # https://developer.spotify.com/console/delete-playlist-tracks/
-        url = BASE_URI + "/playlists/" + playlist_id + "/tracks"
-        params = {}
+        url = f"{PLAYLISTS_URI}/{playlist_id}/tracks"
         data = {"tracks": []}
         if isinstance(track_ids, str):
             data["tracks"].append({"uri": "spotify:track:" + track_ids})
         elif isinstance(track_ids, (list, tuple)):
             data = {"tracks": []}
             for track_id in track_ids:
-                if type(track_id) == str:
+                if isinstance(track_id, str):
                     data["tracks"].append({"uri": "spotify:track:" + track_id})
-                elif type(track_id) == dict:
+                elif isinstance(track_id, dict):
                     positions = track_id.get("positions")
                     if isinstance(positions, (str, int)):
                         positions = [positions]
@@ -676,158 +882,95 @@ class _BaseClient:
                     )
         else:
             raise TypeError("track_ids must be an instance of list, tuple or string")
-        return self._create_request(
-            method="DELETE", url=_build_full_url(url, params), json=data
-        )
+        return self._create_request(method="DELETE", url=url, json=data)
 
     #### Tracks
 
     def _prep_user_tracks(self, market=None, limit=None, offset=None, **kwargs):
-        url = BASE_URI + "/me/tracks"
+        url = ME_TRACKS_URI
         params = dict(market=market, limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_tracks(self, track_ids, market=None, **kwargs):
-        if _is_single_json_type(track_ids):
-            return self._prep__track(
-                track_id=_safe_comma_join_list(track_ids), market=market
-            )
-        url = BASE_URI + "/tracks"
-        params = dict(ids=_safe_comma_join_list(track_ids), market=market)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        track_ids = _valid_ids(track_ids)
+        if len(track_ids) == 1:
+            return self._prep__track(track_id=track_ids[0], market=market)
+        url = TRACKS_URI
+        return self._create_batched_request(
+            "GET", url, track_ids, MAX_TRACK_IDS, market=market
+        )
 
     def _prep__track(self, track_id, market=None, **kwargs):
-        url = BASE_URI + "/tracks/" + track_id
+        url = f"{TRACKS_URI}/{track_id}"
         params = dict(market=market)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
-
-    def _prep_owns_tracks(self, track_ids, **kwargs):
-        url = BASE_URI + "/me/tracks/contains"
-        params = dict(ids=_safe_comma_join_list(track_ids))
-        return self._create_request(method="GET", url=_build_full_url(url, params))
-
-    def _prep_save_tracks(self, track_ids, **kwargs):
-        url = BASE_URI + "/me/tracks"
-        params = dict(ids=_safe_comma_join_list(track_ids))
-        return self._create_request(method="GET", url=_build_full_url(url, params))
-
-    def _prep_delete_tracks(self, track_ids, **kwargs):
-        url = BASE_URI + "/me/tracks"
-        params = dict(ids=_safe_comma_join_list(track_ids))
-        return self._create_request(method="DELETE", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     ##### Artists
 
     def _prep_artists(self, artist_ids, **kwargs):
-        if _is_single_json_type(artist_ids):
-            return self._prep__artist(_safe_comma_join_list(artist_ids))
-        url = BASE_URI + "/artists"
-        params = dict(ids=_safe_comma_join_list(artist_ids))
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        artist_ids = _valid_ids(artist_ids)
+        if len(artist_ids) == 1:
+            return self._prep__artist(artist_ids[0])
+        url = ARTISTS_URI
+        return self._create_batched_request("GET", url, artist_ids, MAX_ARTIST_IDS)
 
     def _prep__artist(self, artist_id, **kwargs):
-        url = BASE_URI + "/artists/" + artist_id
-        params = dict()
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        url = f"{ARTISTS_URI}/{artist_id}"
+        return self._create_request(method="GET", url=url)
 
     def _prep_followed_artists(self, after=None, limit=None, **kwargs):
-        url = BASE_URI + "/me/following"
+        url = ME_FOLLOWING_URI
         params = dict(type="artist", after=after, limit=limit)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
-
-    def _prep_follows_artists(self, artist_ids, **kwargs):
-        url = BASE_URI + "/me/following/contains"
-        params = dict(type="artist", ids=_safe_comma_join_list(artist_ids))
-        return self._create_request(method="GET", url=_build_full_url(url, params))
-
-    def _prep_follow_artists(self, artist_ids, **kwargs):
-        url = BASE_URI + "/me/following"
-        params = dict(type="artist", ids=_safe_comma_join_list(artist_ids))
-        return self._create_request(method="PUT", url=_build_full_url(url, params))
-
-    def _prep_unfollow_artists(self, artist_ids, **kwargs):
-        url = BASE_URI + "/me/following"
-        params = dict(type="artist", ids=_safe_comma_join_list(artist_ids))
-        return self._create_request(method="DELETE", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_artist_related_artists(self, artist_id, **kwargs):
-        url = BASE_URI + "/artists/" + artist_id + "/related-artists"
-        params = {}
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        url = f"{ARTISTS_URI}/{artist_id}/related-artists"
+        return self._create_request(method="GET", url=url)
 
     def _prep_artist_top_tracks(self, artist_id, country=None, **kwargs):
-        url = BASE_URI + "/artists/" + artist_id + "/top-tracks"
+        url = f"{ARTISTS_URI}/{artist_id}/top-tracks"
         params = dict(country=country)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     ##### Albums
 
     def _prep_albums(self, album_ids, market=None, **kwargs):
-        if _is_single_json_type(album_ids):
-            return self._prep__album(_safe_comma_join_list(album_ids), market)
-        url = BASE_URI + "/albums"
-        params = dict(ids=_safe_comma_join_list(album_ids), market=market)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        album_ids = _valid_ids(album_ids)
+        if len(album_ids) == 1:
+            return self._prep__album(album_ids[0], market)
+        url = ALBUMS_URI
+        return self._create_batched_request(
+            "GET", url, album_ids, MAX_ALBUM_IDS, market=market
+        )
 
     def _prep__album(self, album_id, market=None, **kwargs):
-        url = BASE_URI + "/albums/" + album_id
+        url = f"{ALBUMS_URI}/{album_id}"
         params = dict(market=market)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_user_albums(self, limit=None, offset=None, **kwargs):
-        url = BASE_URI + "/me/albums"
+        url = ME_ALBUMS_URI
         params = dict(limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
-
-    def _prep_owns_albums(self, album_ids, **kwargs):
-        url = BASE_URI + "/me/albums/contains"
-        params = dict(ids=_safe_comma_join_list(album_ids))
-        return self._create_request(method="GET", url=_build_full_url(url, params))
-
-    def _prep_save_albums(self, album_ids, **kwargs):
-        url = BASE_URI + "/me/albums"
-        params = dict(ids=_safe_comma_join_list(album_ids))
-        return self._create_request(method="PUT", url=_build_full_url(url, params))
-
-    def _prep_delete_albums(self, album_ids, **kwargs):
-        url = BASE_URI + "/me/albums"
-        params = dict(ids=_safe_comma_join_list(album_ids))
-        return self._create_request(method="DELETE", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     ##### Users
 
     def _prep_me(self, **kwargs):
-        url = BASE_URI + "/me"
+        url = ME_URI
         return self._create_request(method="GET", url=url)
 
     def _prep_user_profile(self, user_id, **kwargs):
-        url = BASE_URI + "/users/" + user_id
-        params = dict()
-        return self._create_request(method="GET", url=_build_full_url(url, params))
-
-    def _prep_follows_users(self, user_ids, **kwargs):
-        url = BASE_URI + "/me/following/contains"
-        params = dict(type="user", ids=_safe_comma_join_list(user_ids))
-        return self._create_request(method="GET", url=_build_full_url(url, params))
-
-    def _prep_follow_users(self, user_ids, **kwargs):
-        url = BASE_URI + "/me/following"
-        params = dict(type="user", ids=_safe_comma_join_list(user_ids))
-        return self._create_request(method="PUT", url=_build_full_url(url, params))
-
-    def _prep_unfollow_users(self, user_ids, **kwargs):
-        url = BASE_URI + "/me/following"
-        params = dict(type="user", ids=_safe_comma_join_list(user_ids))
-        return self._create_request(method="DELETE", url=_build_full_url(url, params))
+        url = f"{USERS_URI}/{user_id}"
+        return self._create_request(method="GET", url=url)
 
     ##### Others
 
     def _prep_album_tracks(
         self, album_id, market=None, limit=None, offset=None, **kwargs
     ):
-        url = BASE_URI + "/albums/" + album_id + "/tracks"
+        url = f"{ALBUMS_URI}/{album_id}/tracks"
         params = dict(market=market, limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_artist_albums(
         self,
@@ -838,23 +981,23 @@ class _BaseClient:
         offset=None,
         **kwargs,
     ):
-        url = BASE_URI + "/artists/" + artist_id + "/albums"
+        url = f"{ARTISTS_URI}/{artist_id}/albums"
         params = dict(
             include_groups=include_groups, market=market, limit=limit, offset=offset
         )
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_user_top_tracks(self, time_range=None, limit=None, offset=None, **kwargs):
-        url = BASE_URI + "/me/top/tracks"
+        url = TOP_TRACKS_URI
         params = dict(time_range=time_range, limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_user_top_artists(
         self, time_range=None, limit=None, offset=None, **kwargs
     ):
-        url = BASE_URI + "/me/top/artists"
+        url = TOP_ARTISTS_URI
         params = dict(time_range=time_range, limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_next_page(self, response=None, url=None, **kwargs):
         if url is None:
@@ -870,30 +1013,60 @@ class _BaseClient:
             return self._create_request(method="GET", url=url)
         return None
 
+    def _prep__remaining_pages(self, response, **kwargs):
+        next_url = response.get("next")
+        if next_url is None:
+            return None
+        if response.get("total") is None or response.get("offset") is None:
+            raise ValueError(
+                "Only offset based paging objects can be fetched at once. Use next_page for cursor based ones"
+            )
+        # Offsets of all the remaining pages are known beforehand, so build all their requests at once
+        url = urlsplit(next_url)
+        query = dict(parse_qsl(url.query))
+        limit = response["limit"]
+        requests = []
+        for offset in range(response["offset"] + limit, response["total"], limit):
+            query["offset"] = offset
+            requests.append(
+                self._create_request(
+                    method="GET", url=url._replace(query=urlencode(query)).geturl()
+                )
+            )
+        return requests or None  # e.g. a stale total
+
+    def _merge_remaining_pages(self, response, pages):
+        """ The paging object passed, with the items of its remaining pages appended. It then holds every item from its offset on """
+        merged = dict(response, items=list(response["items"]))
+        merged["items"].extend((pages or {}).get("items", []))
+        merged["limit"] = len(merged["items"])
+        merged["next"] = None
+        return merged
+
     ##### Personalization & Explore
 
     def _prep_category(self, category_id, country=None, locale=None, **kwargs):
-        url = BASE_URI + "/browse/categories/" + category_id
+        url = f"{CATEGORIES_URI}/{category_id}"
         params = dict(country=country, locale=locale)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_categories(
         self, country=None, locale=None, limit=None, offset=None, **kwargs
     ):
-        url = BASE_URI + "/browse/categories"
+        url = CATEGORIES_URI
         params = dict(country=country, locale=locale, limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_category_playlist(
         self, category_id, country=None, limit=None, offset=None, **kwargs
     ):
-        url = BASE_URI + "/browse/categories/" + category_id + "/playlists"
+        url = f"{CATEGORIES_URI}/{category_id}/playlists"
         params = dict(country=country, limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_available_genre_seeds(self, **kwargs):
         return self._create_request(
-            method="GET", url=BASE_URI + "/recommendations/available-genre-seeds"
+            method="GET", url=GENRE_SEEDS_URI
         )
 
     def _prep_featured_playlists(
@@ -906,8 +1079,8 @@ class _BaseClient:
         **kwargs,
     ):
         if isinstance(timestamp, datetime.datetime):
-            timestamp = timestamp.iso_format()
-        url = BASE_URI + "/browse/featured-playlists"
+            timestamp = timestamp.strftime("%Y-%m-%dT%H:%M:%S")
+        url = FEATURED_PLAYLISTS_URI
         params = dict(
             country=country,
             locale=locale,
@@ -915,18 +1088,18 @@ class _BaseClient:
             limit=limit,
             offset=offset,
         )
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_new_releases(self, country=None, limit=None, offset=None, **kwargs):
-        url = BASE_URI + "/browse/new-releases"
+        url = NEW_RELEASES_URI
         params = dict(country=country, limit=limit, offset=offset)
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_search(
         self, q, types="track", market=None, limit=None, offset=None, **kwargs
     ):
         """ 'track' or ['track'] or 'artist' or ['track','artist'] """
-        url = BASE_URI + "/search"
+        url = SEARCH_URI
         params = dict(
             q=q,
             type=_safe_comma_join_list(types),
@@ -934,24 +1107,24 @@ class _BaseClient:
             limit=limit,
             offset=offset,
         )
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        return self._create_request(method="GET", url=url, params=params)
 
     def _prep_track_audio_analysis(self, track_id, **kwargs):
-        url = BASE_URI + "/audio-analysis/" + track_id
-        params = {}
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        url = f"{AUDIO_ANALYSIS_URI}/{track_id}"
+        return self._create_request(method="GET", url=url)
 
     def _prep_tracks_audio_features(self, track_ids, **kwargs):
-        if _is_single_json_type(track_ids):
-            return self._prep__track_audio_features(_safe_comma_join_list(track_ids))
-        url = BASE_URI + "/audio-features"
-        params = dict(ids=_safe_comma_join_list(track_ids))
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        track_ids = _valid_ids(track_ids)
+        if len(track_ids) == 1:
+            return self._prep__track_audio_features(track_ids[0])
+        url = AUDIO_FEATURES_URI
+        return self._create_batched_request(
+            "GET", url, track_ids, MAX_AUDIO_FEATURES_IDS
+        )
 
     def _prep__track_audio_features(self, track_id, **kwargs):
-        url = BASE_URI + "/audio-features/" + track_id
-        params = dict()
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        url = f"{AUDIO_FEATURES_URI}/{track_id}"
+        return self._create_request(method="GET", url=url)
 
     def _prep_recommendations(
         self,
@@ -1005,54 +1178,52 @@ class _BaseClient:
         **kwargs,
     ):
         """ https://developer.spotify.com/documentation/web-api/reference/browse/get-recommendations/ """
-        url = BASE_URI + "/recommendations"
-        params = dict(
-            limit=limit,
-            market=market,
-            seed_artists=seed_artists,
-            seed_genres=seed_genres,
-            seed_tracks=seed_tracks,
-            min_acousticness=min_acousticness,
-            max_acousticness=max_acousticness,
-            target_acousticness=target_acousticness,
-            min_danceability=min_danceability,
-            max_danceability=max_danceability,
-            target_danceability=target_danceability,
-            min_duration_ms=min_duration_ms,
-            max_duration_ms=max_duration_ms,
-            target_duration_ms=target_duration_ms,
-            min_energy=min_energy,
-            max_energy=max_energy,
-            target_energy=target_energy,
-            min_instrumentalness=min_instrumentalness,
-            max_instrumentalness=max_instrumentalness,
-            target_instrumentalness=target_instrumentalness,
-            min_key=min_key,
-            max_key=max_key,
-            target_key=target_key,
-            min_liveness=min_liveness,
-            max_liveness=max_liveness,
-            target_liveness=target_liveness,
-            min_loudness=min_loudness,
-            max_loudness=max_loudness,
-            target_loudness=target_loudness,
-            min_mode=min_mode,
-            max_mode=max_mode,
-            target_mode=target_mode,
-            min_popularity=min_popularity,
-            max_popularity=max_popularity,
-            target_popularity=target_popularity,
-            min_speechiness=min_speechiness,
-            max_speechiness=max_speechiness,
-            target_speechiness=target_speechiness,
-            min_tempo=min_tempo,
-            max_tempo=max_tempo,
-            target_tempo=target_tempo,
-            min_time_signature=min_time_signature,
-            max_time_signature=max_time_signature,
-            target_time_signature=target_time_signature,
-            min_valence=min_valence,
-            max_valence=max_valence,
-            target_valence=target_valence,
-        )
-        return self._create_request(method="GET", url=_build_full_url(url, params))
+        url = RECOMMENDATIONS_URI
+        args = locals()
+        # Most of the tunable attributes are usually None, so only the ones that were set are encoded
+        params = {k: args[k] for k in _RECOMMENDATIONS_PARAMS if args[k] is not None}
+        return self._create_request(method="GET", url=url, params=params)
+
+
+# kind -> (URL, params) of the first page of the user's library of that kind
+_LIBRARY_SNAPSHOT_PAGES = {
+    "track": (ME_TRACKS_URI, {"limit": 50}),
+    "album": (ME_ALBUMS_URI, {"limit": 50}),
+    "artist": (ME_FOLLOWING_URI, {"type": "artist", "limit": 50}),
+}
+
+# Endpoints that only take a list of IDs e.g. follow_artists(artist_ids). Their _prep_ methods are generated below.
+# name: (HTTP method, URL, max IDs per request, value of the type query param)
+_IDS_ENDPOINTS = {
+    "owns_tracks": ("GET", ME_TRACKS_CONTAINS_URI, MAX_TRACK_IDS, None),
+    "save_tracks": ("PUT", ME_TRACKS_URI, MAX_TRACK_IDS, None),
+    "delete_tracks": ("DELETE", ME_TRACKS_URI, MAX_TRACK_IDS, None),
+    "follows_artists": ("GET", ME_FOLLOWING_CONTAINS_URI, MAX_FOLLOW_IDS, "artist"),
+    "follow_artists": ("PUT", ME_FOLLOWING_URI, MAX_FOLLOW_IDS, "artist"),
+    "unfollow_artists": ("DELETE", ME_FOLLOWING_URI, MAX_FOLLOW_IDS, "artist"),
+    "owns_albums": ("GET", ME_ALBUMS_CONTAINS_URI, MAX_ALBUM_IDS, None),
+    "save_albums": ("PUT", ME_ALBUMS_URI, MAX_ALBUM_IDS, None),
+    "delete_albums": ("DELETE", ME_ALBUMS_URI, MAX_ALBUM_IDS, None),
+    "follows_users": ("GET", ME_FOLLOWING_CONTAINS_URI, MAX_FOLLOW_IDS, "user"),
+    "follow_users": ("PUT", ME_FOLLOWING_URI, MAX_FOLLOW_IDS, "user"),
+    "unfollow_users": ("DELETE", ME_FOLLOWING_URI, MAX_FOLLOW_IDS, "user"),
+}
+
+
+def _make_ids_prep_method(name, method, url, max_ids, type_):
+    ids_arg = name.rsplit("_", 1)[1][:-1] + "_ids"  # e.g. artist_ids for follow_artists
+    extra_params = {"type": type_} if type_ else {}
+
+    def prep(self, ids=None, **kwargs):
+        if ids is None:
+            ids = kwargs.get(ids_arg)
+        return self._create_batched_request(method, url, ids, max_ids, **extra_params)
+
+    prep.__name__ = "_prep_" + name
+    prep.__qualname__ = "_BaseClient._prep_" + name
+    return prep
+
+
+for _name, _spec in _IDS_ENDPOINTS.items():
+    setattr(_BaseClient, "_prep_" + _name, _make_ids_prep_method(_name, *_spec))
+del _name, _spec
@@ -1,13 +1,12 @@
 import os
-import sys
 
 try:
     import ujson as json
 except:  # noqa: E722
     import json
 import socket
-import pickle
 import datetime
+import warnings
 from functools import wraps
 
 
@@ -16,7 +15,7 @@ try:
 except:  # noqa: E722
     DEFAULT_FILENAME_BASE = "Spotify_"
 
-ALL_SCOPES = [
+ALL_SCOPES = (
     "streaming",  # Playback
     "app-remote-control",
     "user-follow-modify",  # Follow
@@ -34,8 +33,8 @@ ALL_SCOPES = [
     "user-library-modify",
     "user-top-read",  # Listening History
     "user-read-recently-played",
-]
-""" List of all scopes provided by Spotify """
+)
+""" All scopes provided by Spotify """
 
 
 class _Creds:
@@ -46,12 +45,19 @@ class _Creds:
         """
         Pickles Credentials
 
+        Deprecated: Use ``save_as_json`` instead.
+
         Arguments:
 
             path (str): path of the directory to store pickle in
 
             name (str): name of the file.
         """
+        warnings.warn(
+            "Pickling credentials is deprecated, use save_as_json instead",
+            DeprecationWarning,
+        )
+        import pickle  # Imported lazily, only the deprecated pickle path needs it
         if path is None:
             path = os.path.dirname(os.path.abspath(__file__))
         if name is None:
@@ -65,12 +71,19 @@ class _Creds:
         """
         Loads a Credentials Pickle from file
 
+        Deprecated: Use ``load_from_json`` instead. Never unpickle a file you don't trust.
+
         Arguments:
 
             path (str): path of the directory you want to unpickle from
 
             name (str): name of the file.
         """
+        warnings.warn(
+            "Unpickling credentials is deprecated, use load_from_json instead",
+            DeprecationWarning,
+        )
+        import pickle
         if path is None:
             path = os.path.dirname(os.path.abspath(__file__))
         if name is None:
@@ -104,15 +117,11 @@ class _Creds:
         if name is None:
             name = DEFAULT_FILENAME_BASE + self.__class__.__name__ + ".json"
         path = os.path.join(path, name)
+        out_dict = self.__dict__.copy()
+        if isinstance(out_dict.get("expiry"), datetime.datetime):
+            out_dict["expiry"] = out_dict["expiry"].isoformat()
         with open(path, "w") as outfile:
-            out_dict = self.__dict__.copy()
-            if 'expiry' in out_dict and out_dict['expiry'] is not None:
-                del out_dict['expiry']
-
-            if "ujson" in sys.modules:
-                json.dump(out_dict, outfile)
-            else:
-                json.dump(out_dict, outfile, default=str)
+            json.dump(out_dict, outfile)
 
     def load_from_json(self, path=None, name=None):
         """
@@ -130,7 +139,10 @@ class _Creds:
             name = DEFAULT_FILENAME_BASE + self.__class__.__name__ + ".json"
         path = os.path.join(path, name)
         with open(path, "r") as infile:
-            self.__dict__.update(json.load(infile))
+            in_dict = json.load(infile)
+        if isinstance(in_dict.get("expiry"), str):
+            in_dict["expiry"] = datetime.datetime.fromisoformat(in_dict["expiry"])
+        self.__dict__.update(in_dict)
 
     def _delete_json(self, path=os.path.dirname(os.path.abspath(__file__)), name=None):
         if name is None:
@@ -190,7 +202,7 @@ class ClientCreds(_Creds):
         if redirect_uri is None:
             redirect_uri = "http://localhost"
         if scopes is None:
-            scopes = ALL_SCOPES
+            scopes = list(ALL_SCOPES)  # A copy, so instances never share a mutable default
         self.client_id = client_id
         self.client_secret = client_secret
         self.scopes = scopes
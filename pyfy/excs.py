@@ -1,4 +1,3 @@
-import pprint
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,7 +8,25 @@ class SpotifyError(Exception):
     Base error class for ApiError and AuthError
     """
 
+    def __init__(self, msg, http_response=None, http_request=None, e=None):
+        self.msg = msg
+        self.http_response = http_response
+        self.http_request = http_request
+        self.code = getattr(http_response, "status_code", None)
+        self._e = e
+        super(SpotifyError, self).__init__(msg)
+        logger.error("%s", self)  # The message is only built if it gets logged
+
+    def __str__(self):
+        return str(
+            self._build_super_msg(
+                self.msg, self.http_response, self.http_request, self._e
+            )
+        )
+
     def _build_super_msg(self, msg, http_res, http_req, e):
+        import pprint  # Only needed once an error message is actually rendered
+
         if not http_req and not http_res and not e:
             return msg
         elif (
@@ -62,15 +79,6 @@ class ApiError(SpotifyError):
         code (int): HTTP status code
     """
 
-    def __init__(self, msg, http_response=None, http_request=None, e=None):
-        self.msg = msg
-        self.http_response = http_response
-        self.http_request = http_request
-        self.code = getattr(http_response, "status_code", None)
-        super_msg = self._build_super_msg(msg, http_response, http_request, e)
-        logger.error(super_msg)
-        super(ApiError, self).__init__(super_msg)
-
 
 class AuthError(SpotifyError):
     """ Raised when a 401 or any Authentication error is encountered
@@ -84,15 +92,10 @@ class AuthError(SpotifyError):
         code (int): HTTP status code
     """
 
-    def __init__(self, msg, http_response=None, http_request=None, e=None):
-        self.msg = msg
-        self.http_response = http_response
-        self.http_request = http_request
-        self.code = getattr(http_response, "status_code", None)
-        super_msg = self._build_super_msg(msg, http_response, http_request, e)
-        logger.error(super_msg)
-        super(AuthError, self).__init__(super_msg)
-
 
 class _TooManyRequests(ApiError):
     pass
+
+
+class _ServerError(ApiError):
+    pass
@@ -1,25 +1,39 @@
 import logging
 from urllib3.util import Retry
 
-from requests import Session, Response
+from requests import Session, Request, Response
 from requests.exceptions import HTTPError, Timeout
 from requests.adapters import HTTPAdapter
+from requests.utils import requote_uri
 from cachecontrol import CacheControlAdapter
+from cachecontrol.cache import DictCache
 
 from .creds import ClientCreds, _set_empty_user_creds_if_none
 from .excs import ApiError, AuthError
-from .utils import _safe_getitem
+from .utils import _safe_getitem, _json_loads
 from .wrappers import (
+    _check_library_snapshot,
+    _update_library_snapshot,
     _dispatch_request,
     _set_and_get_me_attr_sync,
     _default_to_locale,
     _inject_user_id,
 )
-from .base_client import _BaseClient, TOKEN_EXPIRED_MSG
+from .base_client import (
+    _BaseClient,
+    TOKEN_EXPIRED_MSG,
+    DEFAULT_HEADERS,
+    BASE_URI,
+    RETRY_STATUS_CODES,
+    IDEMPOTENT_METHODS,
+)
 
 
 logger = logging.getLogger(__name__)
 
+POOL_CONNECTIONS = 10  # Number of hosts to keep connection pools for
+POOL_MAXSIZE = 20  # Max connections kept alive per host
+
 
 class Spotify(_BaseClient):
     """
@@ -78,6 +92,28 @@ class Spotify(_BaseClient):
             * Sets user_creds info from Spotify to client's user_creds object. e.g. country.
 
             * Default: True
+
+        cache_ttl (float):
+
+            * Seconds a GET response is served from memory instead of requesting it again. Requests that change a resource e.g. PUT /me/following drop the cached responses of that resource
+
+            * Default: None (disabled)
+
+        cache_maxsize (int):
+
+            * Max responses kept in memory when cache_ttl is set
+
+            * Default: 256
+
+        library_snapshot (bool):
+
+            * Answers owns_tracks, owns_albums and follows_artists from the IDs of the user's saved tracks, saved albums and followed artists
+
+            * Each is fetched once, when first checked, then kept up to date by this client's save, delete, follow and unfollow methods
+
+            * Pass force_network=True to a check to ask Spotify instead
+
+            * Default: False
     """
 
     IS_ASYNC = False
@@ -95,6 +131,9 @@ class Spotify(_BaseClient):
         default_to_locale=True,
         cache=True,
         populate_user_creds=True,
+        cache_ttl=None,
+        cache_maxsize=256,
+        library_snapshot=False,
     ):
         super().__init__(
             access_token,
@@ -108,6 +147,9 @@ class Spotify(_BaseClient):
             default_to_locale,
             cache,
             populate_user_creds,
+            cache_ttl,
+            cache_maxsize,
+            library_snapshot,
         )
         if populate_user_creds and self.user_creds:
             self.populate_user_creds()
@@ -122,22 +164,58 @@ class Spotify(_BaseClient):
             self._populate_user_creds(me)
 
     def _create_session(self, max_retries, proxies, backoff_factor, cache):
+        self._prepped_templates = {}  # Templates belong to the session they were prepared with
         sess = Session()
-        # Retry only on idempotent methods and only when too many requests
+        # Retry only on idempotent methods and only when too many requests or the server failed.
+        # Spotify's Retry-After is honored. Once retries run out, the last response is returned so it raises an ApiError.
         retries = Retry(
             total=max_retries,
             backoff_factor=backoff_factor,
-            status_forcelist=[429],
-            method_whitelist=["GET", "UPDATE", "DELETE"],
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
         )
-        retries_adapter = HTTPAdapter(max_retries=retries)
+        # One adapter for both schemes. All of Spotify's endpoints are HTTPS,
+        # so mounting on "http://" only would leave them on the default adapter (no retries).
         if cache:
-            cache_adapter = CacheControlAdapter(cache_etags=True)
-        sess.mount("http://", retries_adapter)
-        sess.mount("http://", cache_adapter)
+            adapter = CacheControlAdapter(
+                cache_etags=True,
+                max_retries=retries,
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+            )
+        else:
+            adapter = HTTPAdapter(
+                max_retries=retries,
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+            )
+        sess.mount("https://", adapter)
+        sess.mount("http://", adapter)
+        sess.headers.update(DEFAULT_HEADERS)
         sess.proxies.update(proxies)
         return sess
 
+    def _clear_http_cache(self):
+        cache = getattr(self._session.get_adapter(BASE_URI), "cache", None)
+        if isinstance(cache, DictCache):
+            with cache.lock:
+                cache.data.clear()
+
+    def _library_ids(self, kind):
+        """ IDs of the user's library of a kind e.g. "track". Pages through all of it the first time """
+        ids = self._library_snapshot.get(kind)
+        if ids is None:
+            ids = set()
+            request = self._prep_library_snapshot(kind)
+            while request is not None:
+                page = _json_loads(self._send_authorized_request(request).content)
+                page_ids, request = self._library_snapshot_page(kind, page)
+                ids.update(page_ids)
+            self._library_snapshot[kind] = ids
+        return ids
+
     @_dispatch_request
     def _check_authorization(self):
         """
@@ -147,17 +225,37 @@ class Spotify(_BaseClient):
 
     def _send_authorized_request(self, r):
         if (
-            getattr(self._caller, "access_is_expired", None) is True
+            self._caller_access_is_expired is True
         ):  # True if expired and None if there's no expiry set
             self._refresh_token()
         r.headers.update(self._access_authorization_header)
         return self._send_request(r)
 
+    def _prepare_request(self, r):
+        # Prepare through the session so its default headers, proxies and mounted adapters apply
+        if r.json is None and not (r.data or r.files or r.params):
+            # Body-less requests only differ by method, URL (query already encoded) and headers,
+            # so copy a prepared template of their method instead of running the whole preparation
+            # pipeline for each request. e.g. PUT /me/following?ids= keeps the template's Content-Length: 0
+            template = self._prepped_templates.get(r.method)
+            if template is None:
+                template = self._session.prepare_request(
+                    Request(method=r.method, url=BASE_URI)
+                )
+                self._prepped_templates[r.method] = template
+            prepped = template.copy()
+            prepped.url = requote_uri(r.url)
+            prepped.headers.update(r.headers)
+            return prepped
+        return self._session.prepare_request(r)
+
     def _send_request(self, r):
-        prepped = r.prepare()
+        prepped = self._prepare_request(r)
         logger.debug(r.url)
         try:
-            res = self._session.send(prepped, timeout=self.timeout)
+            res = self._session.send(
+                prepped, timeout=self.timeout, allow_redirects=False
+            )
             res.raise_for_status()
         except Timeout as e:
             raise ApiError(
@@ -167,26 +265,27 @@ class Spotify(_BaseClient):
                 e=e,
             )
         except HTTPError as e:
+            try:
+                err_json = _json_loads(res.content)  # Parsed once for all branches below
+            except ValueError:
+                err_json = {}
             if res.status_code == 401:
-                if (
-                    res.json().get("error", None).get("message", None)
-                    == TOKEN_EXPIRED_MSG
-                ):
+                if _safe_getitem(err_json, "error", "message") == TOKEN_EXPIRED_MSG:
                     old_auth_header = r.headers["Authorization"]
                     self._refresh_token()  # Should either raise an error or refresh the token
                     new_auth_header = self._access_authorization_header
-                    if new_auth_header == old_auth_header:
+                    if new_auth_header["Authorization"] == old_auth_header:
                         msg = "refresh_token() was successfully called but token wasn't refreshed. Execution stopped to avoid infinite looping."
                         logger.critical(msg)
                         raise RuntimeError(msg)
                     r.headers.update(new_auth_header)
                     return self._send_request(r)
                 else:
-                    msg = res.json().get("error_description") or res.json()
+                    msg = _safe_getitem(err_json, "error_description") or err_json
                     raise AuthError(msg=msg, http_response=res, http_request=r, e=e)
             else:
-                msg = _safe_getitem(res.json(), "error", "message") or _safe_getitem(
-                    res.json(), "error_description"
+                msg = _safe_getitem(err_json, "error", "message") or _safe_getitem(
+                    err_json, "error_description"
                 )
                 raise ApiError(msg=msg, http_response=res, http_request=r, e=e)
         else:
@@ -223,7 +322,7 @@ class Spotify(_BaseClient):
                 e=e,
             )
         else:
-            new_creds_json = res.json()
+            new_creds_json = _json_loads(res.content)
             new_creds_model = self._client_json_to_object(new_creds_json)
             self._update_client_creds_with(new_creds_model)
             self._caller = self.client_creds
@@ -253,7 +352,7 @@ class Spotify(_BaseClient):
 
     def _refresh_user_token(self):
         r = self._prep_refresh_user_token()
-        res = self._send_request(r).json()
+        res = _json_loads(self._send_request(r).content)
         new_creds_obj = self._user_json_to_object(res)
         self._update_user_creds_with(new_creds_obj)
 
@@ -1125,6 +1224,7 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    @_check_library_snapshot("track")
     @_dispatch_request
     def owns_tracks(self, *args, **kwargs):
         """
@@ -1136,6 +1236,12 @@ class Spotify(_BaseClient):
 
                 * Required
 
+            force_network (bool):
+
+                * Asks Spotify even if library_snapshot is enabled
+
+                * Default: False
+
         Returns:
 
             dict:
@@ -1146,6 +1252,7 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("track", added=True)
     @_dispatch_request
     def save_tracks(self, *args, **kwargs):
         """
@@ -1157,6 +1264,12 @@ class Spotify(_BaseClient):
 
                 * Required
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1167,6 +1280,7 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("track", added=False)
     @_dispatch_request
     def delete_tracks(self, *args, **kwargs):
         """
@@ -1177,6 +1291,12 @@ class Spotify(_BaseClient):
             track_ids (str, list):
 
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1234,6 +1354,7 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    @_check_library_snapshot("artist")
     @_dispatch_request
     def follows_artists(self, *args, **kwargs):
         """
@@ -1245,6 +1366,12 @@ class Spotify(_BaseClient):
 
                 * Required
 
+            force_network (bool):
+
+                * Asks Spotify even if library_snapshot is enabled
+
+                * Default: False
+
         Returns:
 
             dict:
@@ -1255,6 +1382,7 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("artist", added=True)
     @_dispatch_request
     def follow_artists(self, *args, **kwargs):
         """
@@ -1266,6 +1394,12 @@ class Spotify(_BaseClient):
 
                 * Required
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1276,6 +1410,7 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("artist", added=False)
     @_dispatch_request
     def unfollow_artists(self, *args, **kwargs):
         """
@@ -1287,6 +1422,12 @@ class Spotify(_BaseClient):
 
                 * Required
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1397,6 +1538,7 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    @_check_library_snapshot("album")
     @_dispatch_request
     def owns_albums(self, *args, **kwargs):
         """
@@ -1408,6 +1550,12 @@ class Spotify(_BaseClient):
 
                 * Required
 
+            force_network (bool):
+
+                * Asks Spotify even if library_snapshot is enabled
+
+                * Default: False
+
         Returns:
 
             dict:
@@ -1418,6 +1566,7 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("album", added=True)
     @_dispatch_request
     def save_albums(self, *args, **kwargs):
         """
@@ -1429,6 +1578,12 @@ class Spotify(_BaseClient):
 
                 * Required
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1439,6 +1594,7 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    @_update_library_snapshot("album", added=False)
     @_dispatch_request
     def delete_albums(self, *args, **kwargs):
         """
@@ -1450,6 +1606,12 @@ class Spotify(_BaseClient):
 
                 * Required
 
+            skip_if_cached (bool):
+
+                * Doesn't send IDs the library_snapshot shows need no change, nor the request if none do
+
+                * Default: True
+
         Returns:
 
             dict:
@@ -1755,6 +1917,43 @@ class Spotify(_BaseClient):
         """
         return args, kwargs
 
+    def remaining_pages(self, response, **kwargs):
+        """
+        Remaining Pages
+
+        Fetches all the pages that come after an offset based paging object and appends their items to its own
+
+        Note:
+
+            * Pages are requested one after the other
+
+            * Cursor based paging objects e.g. the ones of followed artists can only be walked through with next_page
+
+        Arguments:
+
+            response (dict):
+
+                * Paging object i.e. a response that has items, offset, limit, total and next keys
+
+                * Required
+
+        Returns:
+
+            dict: The paging object passed holding every item from its offset on. Its next is None
+
+        Raises:
+
+            pyfy.excs.ApiError:
+        """
+        pages = self._remaining_pages(response, **kwargs)
+        if kwargs.get("to_gather") is True:
+            return pages
+        return self._merge_remaining_pages(response, pages)
+
+    @_dispatch_request
+    def _remaining_pages(self, *args, **kwargs):
+        return args, kwargs
+
     ##### Personalization & Explore
 
     @_dispatch_request
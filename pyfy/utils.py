@@ -1,5 +1,12 @@
+import copy
+import re
+import time
+import base64
 import datetime
 import secrets
+from collections import OrderedDict
+from collections.abc import Iterable
+from functools import lru_cache
 from urllib import parse
 
 try:
@@ -7,10 +14,18 @@ try:
 except:  # noqa: E722
     import json
 
+try:
+    from orjson import loads as _json_loads  # Faster to decode Spotify's large responses
+except ImportError:
+    _json_loads = json.loads
+
 
-def _create_secret(bytes_length=32):  # pragma: no cover
-    return secrets.base64.standard_b64encode(secrets.token_bytes(bytes_length)).decode(
-        "utf-8"
+def _create_secret(bytes_length=32):
+    """ URL safe and unpadded, so it can be used as is as an OAuth2 state """
+    return (
+        base64.urlsafe_b64encode(secrets.token_bytes(bytes_length))
+        .rstrip(b"=")
+        .decode("ascii")
     )
 
 
@@ -44,7 +59,7 @@ def _get_key_recursively(response, key, limit):
         new_stack = []
         for dct in stack:
             for k, v in dct.items():
-                if type(v) == dict:
+                if isinstance(v, dict):
                     new_stack.append(v)
 
         # Prepare for next iteration
@@ -54,45 +69,167 @@ def _get_key_recursively(response, key, limit):
     return None  # if iterations don't give back results
 
 
+_EMPTY_QUERY_VALUES = (None, "", (), [], {})
+
+
+def _query_value(value):
+    if isinstance(value, bool):
+        return json.dumps(value)
+    elif isinstance(value, (list, tuple)):  # Spotify expects comma separated values, not repeated keys
+        return ",".join(map(str, value))
+    return value
+
+
 def _safe_query_string(query):
-    bad_types = [None, tuple(), dict(), list()]
-    safe_query = {}
-    for k, v in query.items():
-        if v not in bad_types:
-            if type(v) == bool:
-                v = json.dumps(v)
-            safe_query[k] = v
-    return safe_query
+    return {
+        k: _query_value(v) for k, v in query.items() if v not in _EMPTY_QUERY_VALUES
+    }
+
+
+@lru_cache(maxsize=1024)
+def _encode_query(items):
+    return parse.urlencode(items)
 
 
 def _build_full_url(url, query):
-    if not isinstance(query, (dict, str)):
-        raise TypeError("Queries must be an instance of either a dict or string")
-    safe_query = _safe_query_string(query)
-    if safe_query:
-        return url + "?" + parse.urlencode(safe_query)
+    if isinstance(query, str):
+        query_string = query.lstrip("?&")
+    elif isinstance(query, dict):
+        # Values are stringified (as urlencode would) so that the cache key is hashable
+        # and True, 1 and 1.0 don't share an entry. Item order is kept as is.
+        query_string = _encode_query(
+            tuple((k, str(v)) for k, v in _safe_query_string(query).items())
+        )
     else:
+        raise TypeError("Queries must be an instance of either a dict or string")
+    if not query_string:
         return url
+    return url + ("&" if "?" in url else "?") + query_string
 
 
 def _safe_comma_join_list(list_):
+    """ Joins IDs from any iterable e.g. a list, set or generator. Strings (already joined) and other values are returned as is """
     if isinstance(list_, (list, tuple)):
         return ",".join(list_)
-    else:
+    elif isinstance(list_, str) or not isinstance(list_, Iterable):
         return list_
+    return ",".join(list_)
+
+
+_is_spotify_id = re.compile(r"[0-9A-Za-z]{22}").fullmatch  # base62, fixed width
+
+
+def _valid_ids(ids):
+    """ Returns IDs of tracks, albums, artists etc. as a list, split if comma joined, after checking they are Spotify IDs.
+    Raises a ValueError for malformed IDs rather than sending a request Spotify would answer with a 400 """
+    if isinstance(ids, str):
+        ids = ids.split(",")  # So that joined IDs are batched too
+    elif isinstance(ids, Iterable):
+        ids = list(ids)
+    else:
+        raise ValueError("Expected Spotify IDs, got: {!r}".format(ids))
+    invalid = [
+        id_ for id_ in ids if not isinstance(id_, str) or not _is_spotify_id(id_)
+    ]
+    if invalid:
+        raise ValueError(
+            "Spotify IDs are 22 alphanumeric characters. Invalid IDs: {}".format(
+                invalid
+            )
+        )
+    return ids
+
+
+def _chunk_ids(ids, size):
+    """ Splits a list or tuple of IDs into lists of at most `size` IDs """
+    return [ids[i : i + size] for i in range(0, len(ids), size)]
+
+
+def _merge_json_responses(responses):
+    """ Merges the JSON responses of a request that was split into several requests.
+    Lists are concatenated. For dicts, list values are concatenated key by key. """
+    merged = responses[0]
+    for response in responses[1:]:
+        if isinstance(merged, list):
+            merged.extend(response)
+        else:
+            for k, v in response.items():
+                if isinstance(v, list) and isinstance(merged.get(k), list):
+                    merged[k].extend(v)
+                else:
+                    merged.setdefault(k, v)
+    return merged
+
+
+_SINGLE_JSON_TYPES = (str, int, float)  # bool is an int
 
 
 def _is_single_json_type(resource):
-    if isinstance(resource, (int, str, float, bool)):
-        return True
-    elif len(resource) == 1:
-        return True
-    return False
+    return isinstance(resource, _SINGLE_JSON_TYPES) or len(resource) == 1
+
+
+def convert_from_iso_date(date):
+    """ utility method that can convert dates returned from Spotify's API
+
+    Dates with a year or month precision e.g. an album's release date "1981" or "1981-12" default to the first day """
+    try:
+        return datetime.date.fromisoformat(date)
+    except ValueError:
+        return datetime.datetime.strptime(date, "%Y-%m" if len(date) == 7 else "%Y").date()
+
+
+def _resource_path(url):
+    """ Path of the resource a URL belongs to e.g. /v1/me/following for https://api.spotify.com/v1/me/following/contains?ids=1 """
+    return "/".join(parse.urlsplit(url).path.split("/")[:4])
+
+
+class _TTLCache:
+    """ LRU cache of JSON responses that expire ttl seconds after being cached """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires at, resource path, json)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry[2])  # So that callers can't mutate the cached response
+
+    def set(self, key, url, json_res):
+        self._entries[key] = (
+            time.monotonic() + self.ttl,
+            _resource_path(url),
+            copy.deepcopy(json_res),
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, url):
+        """ Drops all responses of the resource url belongs to """
+        path = _resource_path(url)
+        for key in [k for k, v in self._entries.items() if v[1] == path]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
 
+class _RemainingPageRequests(list):
+    """ Requests of the remaining pages of a paging object, kept with it so that gathering them can merge the pages into it """
 
-def convert_from_iso_date(date):  # pragma: no cover
-    """ utility method that can convert dates returned from Spotify's API """
-    return datetime.date.fromisoformat(date)
+    def __init__(self, requests, response):
+        super().__init__(requests)
+        self.response = response
 
 
 class _Dict(dict):  # pragma: no cover
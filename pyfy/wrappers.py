@@ -1,35 +1,22 @@
 from functools import wraps
 from inspect import iscoroutinefunction
 
-from json.decoder import JSONDecodeError
+from .utils import _merge_json_responses, _json_loads
 
 
 def _set_and_get_me_attr_sync(self, attr_name):
-    """ either populates user creds from spotify or just calls self.me and gets (and sets) the attr_name passed """
-    # if attribute doesn't exist or if it exists but is set to None, do:
-    if (not hasattr(self.user_creds, attr_name)) or (
-        hasattr(self.user_creds, attr_name)
-        and getattr(self.user_creds, attr_name) is None
-    ):
-        if self._populate_user_creds_ is True:
-            self.populate_user_creds()
-        else:
-            setattr(self.user_creds, attr_name, self.me().get(attr_name))
+    """ populates user creds from spotify if the attr_name passed isn't set yet, then gets it """
+    # Every field of /me is kept, so that getting another attribute later doesn't request /me again
+    if getattr(self.user_creds, attr_name, None) is None:
+        self.populate_user_creds()
     return getattr(self.user_creds, attr_name, None)
 
 
 async def _set_and_get_me_attr_async(self, attr_name):
-    """ either populates user creds from spotify or just calls self.me() and only gets the attr_name passed """
-    # if attribute doesn't exist or if it exists but is set to None, do:
-    if (not hasattr(self.user_creds, attr_name)) or (
-        hasattr(self.user_creds, attr_name)
-        and getattr(self.user_creds, attr_name) is None
-    ):
-        if self._populate_user_creds_ is True:
-            await self.populate_user_creds()
-        else:
-            me = await self.me()
-            setattr(self.user_creds, attr_name, me.get(attr_name))
+    """ populates user creds from spotify if the attr_name passed isn't set yet, then gets it """
+    # Every field of /me is kept, so that getting another attribute later doesn't request /me again
+    if getattr(self.user_creds, attr_name, None) is None:
+        await self.populate_user_creds()
     return getattr(self.user_creds, attr_name, None)
 
 
@@ -115,15 +102,140 @@ def _inject_user_id(f):
     return wrapper
 
 
+def _library_ids_argument(kind, args, kwargs):
+    """ The IDs passed to a method of the user's library e.g. track_ids, as a list """
+    ids = args[0] if args else kwargs.get(kind + "_ids", kwargs.get("ids"))
+    if isinstance(ids, str):
+        return ids.split(",")
+    return list(ids)
+
+
+def _check_library_snapshot(kind):
+    """
+    Answers whether or not IDs are in the user's library from the client's library snapshot, if enabled.
+    No request is sent other than the ones filling the snapshot the first time. force_network=True asks Spotify instead """
+
+    def outer_wrapper(f):
+        @wraps(f)
+        def wrapper(self, *args, force_network=False, **kwargs):
+            if (
+                self._library_snapshot is None
+                or force_network
+                or kwargs.get("to_gather") is True
+            ):
+                return f(self, *args, **kwargs)
+            ids = self._library_ids(kind)
+            return [id_ in ids for id_ in _library_ids_argument(kind, args, kwargs)]
+
+        @wraps(f)
+        async def async_wrapper(self, *args, force_network=False, **kwargs):
+            if (
+                self._library_snapshot is None
+                or force_network
+                or kwargs.get("to_gather") is True
+            ):
+                return await f(self, *args, **kwargs)
+            ids = await self._library_ids(kind)
+            return [id_ in ids for id_ in _library_ids_argument(kind, args, kwargs)]
+
+        if iscoroutinefunction(f):
+            return async_wrapper
+        return wrapper
+
+    return outer_wrapper
+
+
+def _update_library_snapshot(kind, added):
+    """
+    Once the request succeeded, adds the IDs passed to the client's library snapshot (if filled) or discards them if not added.
+    Unless skip_if_cached=False, IDs the snapshot shows are already saved/followed (or not, if not added) aren't sent,
+    and if none are left no request is sent at all """
+
+    def new_ids(self, args, kwargs, skip_if_cached):
+        """ Returns the snapshot of the kind if filled and the IDs to send. None if the IDs are sent as passed """
+        snapshot = (self._library_snapshot or {}).get(kind)
+        if snapshot is None or kwargs.get("to_gather") is True:
+            return None, None
+        ids = _library_ids_argument(kind, args, kwargs)
+        if skip_if_cached:
+            ids = [id_ for id_ in ids if (id_ in snapshot) is not added]
+        return snapshot, ids
+
+    def update(snapshot, ids):
+        if added:
+            snapshot.update(ids)
+        else:
+            snapshot.difference_update(ids)
+
+    def without_ids(kwargs):
+        return {k: v for k, v in kwargs.items() if k not in (kind + "_ids", "ids")}
+
+    def outer_wrapper(f):
+        @wraps(f)
+        def wrapper(self, *args, skip_if_cached=True, **kwargs):
+            snapshot, ids = new_ids(self, args, kwargs, skip_if_cached)
+            if snapshot is None:
+                return f(self, *args, **kwargs)
+            if not ids:
+                return {}
+            res = f(self, ids, *args[1:], **without_ids(kwargs))
+            update(snapshot, ids)
+            return res
+
+        @wraps(f)
+        async def async_wrapper(self, *args, skip_if_cached=True, **kwargs):
+            snapshot, ids = new_ids(self, args, kwargs, skip_if_cached)
+            if snapshot is None:
+                return await f(self, *args, **kwargs)
+            if not ids:
+                return {}
+            res = await f(self, ids, *args[1:], **without_ids(kwargs))
+            update(snapshot, ids)
+            return res
+
+        if iscoroutinefunction(f):
+            return async_wrapper
+        return wrapper
+
+    return outer_wrapper
+
+
 def _dispatch_request(*_args, authorized_request=True):
     """ 
     1. Preps request after all argument injections have been injected
     2. Returns the request if to_gather was specified
     3. Defaults to sending an authorized request
     4. if authorized_request is False it, will send an request without the default authorization headers
+    5. If the request was split into a list of requests (too many IDs), sends them all and merges their responses
     """
 
     def outer_wrapper(f):
+        def send_sync(self, request):
+            cache_key, cached = self._cached_response(request, authorized_request)
+            if cached is not None:
+                return cached
+            if authorized_request is True:
+                res = self._send_authorized_request(request)
+            else:
+                res = self._send_request(request)
+            try:
+                json_res = _json_loads(res.content)
+            except ValueError:  # Empty or non JSON body
+                return {}
+            self._cache_response(cache_key, request, json_res)
+            return json_res
+
+        async def send_async(self, request):
+            cache_key, cached = self._cached_response(request, authorized_request)
+            if cached is not None:
+                return cached
+            if authorized_request is True:
+                json_res = (await self._send_authorized_requests(request)).json
+            else:
+                json_res = (await self._send_requests(request)).json
+            self._cache_response(cache_key, request, json_res)
+            return json_res
+
         @wraps(f)
         def sync_wrapper(self, *args, **kwargs):
             args_with_injections, kwargs_with_injections = f(self, *args, **kwargs)
@@ -136,14 +248,12 @@ def _dispatch_request(*_args, authorized_request=True):
                 return request
 
             else:
-                if request is not None:  # compat for next_page and prev_page
-                    try:
-                        if authorized_request is True:
-                            return self._send_authorized_request(request).json()
-                        else:
-                            return self._send_request(request).json()
-                    except JSONDecodeError:
-                        return {}
+                if isinstance(request, list):
+                    return _merge_json_responses(
+                        [send_sync(self, req) for req in request]
+                    )
+                elif request is not None:  # compat for next_page and prev_page
+                    return send_sync(self, request)
                 else:
                     return {}
 
@@ -161,11 +271,18 @@ def _dispatch_request(*_args, authorized_request=True):
                 return request
 
             else:
-                if request is not None:  # compat for next_page and prev_page
+                if isinstance(request, list):
+                    for req in request:
+                        self._invalidate_cached_responses(req)
                     if authorized_request is True:
-                        return (await self._send_authorized_requests(request)).json
+                        responses = await self._send_authorized_requests(
+                            *request, gather=True
+                        )
                     else:
-                        return (await self._send_requests(request)).json
+                        responses = await self._send_requests(*request, gather=True)
+                    return _merge_json_responses([res.json for res in responses])
+                elif request is not None:  # compat for next_page and prev_page
+                    return await send_async(self, request)
                 else:
                     return {}
 
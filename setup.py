@@ -20,6 +20,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     install_requires=requirements,
     tests_require=test_requirements,
+    extras_require={"orjson": ["orjson"]},
     url="https://github.com/omarryhan/pyfy",
     packages=setuptools.find_packages(),
     classifiers=[
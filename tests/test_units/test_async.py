@@ -1,5 +1,119 @@
+import json
+
+import pytest
+from aiohttp import ClientResponseError
+
 from pyfy.async_client import AsyncSpotify
+from pyfy.utils import _Dict
 
 
 def test_async_instantiates_empty():
     AsyncSpotify()
+
+
+class _FakeResponse:
+    def __init__(self, status, body="", headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def json(self, content_type=None, loads=json.loads):
+        return loads(self._body) if self._body else None
+
+    async def text(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise ClientResponseError(None, (), status=self.status)
+
+
+class _FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    async def request(self, headers=None, **kwargs):
+        self.sent_headers.append(headers)
+        return self.responses.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_async_revalidates_cached_get_with_etag():
+    spt = AsyncSpotify()
+    sess = _FakeSession(
+        _FakeResponse(200, '{"id": "me"}', {"ETag": '"abc"'}), _FakeResponse(304)
+    )
+    r = _Dict(method="GET", url="https://api.spotify.com/v1/me", headers={})
+
+    first = await spt._handle_send_requests(sess, r)
+    second = await spt._handle_send_requests(sess, r)
+
+    assert "If-None-Match" not in sess.sent_headers[0]
+    assert sess.sent_headers[1]["If-None-Match"] == '"abc"'
+    assert first.json == second.json == {"id": "me"}
+    assert first.json is not second.json
+    assert r["headers"] == {}
+
+
+@pytest.mark.asyncio
+async def test_async_context_manager_keeps_session_open():
+    spt = AsyncSpotify()
+    async with spt as same_spt:
+        assert same_spt is spt
+        sess = spt._http_session
+        assert not sess.closed
+    assert sess.closed
+    assert spt._http_session is None
+
+
+@pytest.mark.asyncio
+async def test_async_retries_idempotent_requests_on_server_errors():
+    spt = AsyncSpotify(backoff_factor=0.001)
+    sess = _FakeSession(_FakeResponse(503), _FakeResponse(200, '{"id": "me"}'))
+    r = _Dict(method="GET", url="https://api.spotify.com/v1/me", headers={})
+    res = await spt._send_request_with_backoff(r, sess)
+    assert res.json == {"id": "me"}
+    assert not sess.responses
+
+
+@pytest.mark.asyncio
+async def test_async_waits_for_retry_after(mocker):
+    sleep = mocker.patch("pyfy.async_client.asyncio.sleep")
+    spt = AsyncSpotify(timeout=5)
+    await spt._wait_retry_after(_FakeResponse(429, headers={"Retry-After": "2"}))
+    await spt._wait_retry_after(_FakeResponse(429, headers={"Retry-After": "60"}))
+    await spt._wait_retry_after(_FakeResponse(429))
+    assert [call.args[0] for call in sleep.call_args_list] == [2, 5]
+
+
+@pytest.mark.asyncio
+async def test_async_gathered_remaining_pages_are_merged_into_the_page(mocker):
+    spt = AsyncSpotify(access_token="abc", populate_user_creds=False)
+    page = {
+        "items": [1, 2],
+        "limit": 2,
+        "offset": 0,
+        "total": 5,
+        "next": "https://api.spotify.com/v1/me/tracks?offset=2&limit=2",
+    }
+
+    async def send(*requests, **kwargs):
+        return [
+            _Dict(json={"items": [3, 4], "offset": 2, "next": "x"}),
+            _Dict(json={"items": [5]}),
+        ]
+
+    mocker.patch.object(spt, "_send_authorized_requests", side_effect=send)
+    merged, stale = await spt.gather(
+        spt.remaining_pages(page, to_gather=True),
+        spt.remaining_pages(dict(page, total=2), to_gather=True),
+    )
+    assert merged == dict(page, items=[1, 2, 3, 4, 5], limit=5, next=None)
+    assert stale == dict(page, total=2, next=None)
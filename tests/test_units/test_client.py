@@ -1,7 +1,23 @@
-from pyfy import Spotify, UserCreds
+import datetime
+import json
+from unittest.mock import Mock
+
+from pyfy import Spotify, UserCreds, ClientCreds
 import pytest
 
 
+A, B, C = ("a" * 22, "b" * 22, "c" * 22)  # Spotify IDs
+
+
+def _spotify_ids(n):
+    return ["{:0>22}".format(i) for i in range(n)]
+
+
+def _json_responses(*bodies):
+    """ One response per request sent, with the JSON bodies passed """
+    return [Mock(content=json.dumps(body).encode()) for body in bodies]
+
+
 def test_sync_client_instantiates_empty():
     Spotify()
 
@@ -50,3 +66,291 @@ def test_populate_user_creds(me_stub):
     spt._populate_user_creds(me_stub)
     assert getattr(spt.user_creds, "type", None) is None
     assert spt.user_creds.product == "premium"
+
+
+def test_access_authorization_header_follows_token():
+    spt = Spotify(access_token="first", populate_user_creds=False)
+    header = spt._access_authorization_header
+    assert header["Authorization"] == "Bearer first"
+    assert spt._access_authorization_header is header
+    spt.user_creds.access_token = "second"
+    assert spt._access_authorization_header["Authorization"] == "Bearer second"
+
+
+def test_client_authorization_header_follows_creds():
+    spt = Spotify(client_creds=ClientCreds(client_id="id", client_secret="secret"))
+    header = spt._client_authorization_header
+    assert header["Authorization"] == "Basic aWQ6c2VjcmV0"
+    assert spt._client_authorization_header is header
+    spt.client_creds.client_secret = "other"
+    assert spt._client_authorization_header is not header
+
+
+def test_refresh_request_headers():
+    spt = Spotify(
+        client_creds=ClientCreds(client_id="id", client_secret="secret"),
+        user_creds=UserCreds(refresh_token="refresh"),
+        populate_user_creds=False,
+    )
+    req = spt._prep_refresh_user_token()
+    assert req.headers == {
+        "Authorization": "Basic aWQ6c2VjcmV0",
+        "Content-Type": "application/x-www-form-urlencoded",
+    }
+    assert "Authorization" not in Spotify._FORM_URLENCODED
+
+
+def test_too_many_ids_are_split_and_merged(mocker):
+    spt = Spotify(access_token="abc", populate_user_creds=False)
+    album_ids = _spotify_ids(45)
+
+    requests = spt._prep_albums(album_ids)
+    assert len(requests) == 3
+    assert requests[-1].url.endswith("ids=" + "%2C".join(album_ids[40:]))
+
+    responses = _json_responses({"albums": [1]}, {"albums": [2]}, {"albums": [3]})
+    mocker.patch.object(spt, "_send_authorized_request", side_effect=responses)
+    assert spt.albums(album_ids) == {"albums": [1, 2, 3]}
+
+
+def test_auth_uri():
+    spt = Spotify(
+        client_creds=ClientCreds(
+            client_id="id", scopes=["user-read-email", "streaming"]
+        )
+    )
+    assert spt.auth_uri() == (
+        "https://accounts.spotify.com/authorize?redirect_uri=http://localhost"
+        "&client_id=id&response_type=code&scope=user-read-email+streaming&show_dialog=false"
+    )
+    assert spt.auth_uri(state="abc").endswith("&show_dialog=false&state=abc")
+
+
+def test_featured_playlists_timestamp():
+    spt = Spotify()
+    r = spt._prep_featured_playlists(timestamp=datetime.datetime(2019, 1, 2, 3, 4, 5))
+    assert "timestamp=2019-01-02T03%3A04%3A05" in r.url
+
+
+def test_update_user_creds_skips_none():
+    spt = Spotify(
+        user_creds=UserCreds(access_token="old", refresh_token="refresh"),
+        populate_user_creds=False,
+    )
+    spt._update_user_creds_with(UserCreds(access_token="new"))
+    assert spt.user_creds.access_token == "new"
+    assert spt.user_creds.refresh_token == "refresh"
+
+
+def test_caller_access_is_expired_follows_expiry():
+    spt = Spotify(user_creds=UserCreds(access_token="tok"), populate_user_creds=False)
+    assert spt._caller_access_is_expired is None
+    spt.user_creds.expiry = datetime.datetime.utcnow() + datetime.timedelta(minutes=2)
+    assert spt._caller_access_is_expired is False
+    spt.user_creds.expiry = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+    assert spt._caller_access_is_expired is True
+    assert spt._caller_access_is_expired is spt.user_creds.access_is_expired
+
+
+def test_remaining_pages_are_requested_by_offset(mocker):
+    spt = Spotify(access_token="abc", populate_user_creds=False)
+    page = {
+        "items": [1, 2],
+        "limit": 2,
+        "offset": 0,
+        "total": 5,
+        "next": "https://api.spotify.com/v1/me/tracks?offset=2&limit=2&market=SE",
+    }
+
+    requests = spt._prep__remaining_pages(page)
+    assert [r.url.split("?")[1] for r in requests] == [
+        "offset=2&limit=2&market=SE",
+        "offset=4&limit=2&market=SE",
+    ]
+    assert spt._prep__remaining_pages(dict(page, next=None)) is None
+    with pytest.raises(ValueError):
+        spt._prep__remaining_pages({"items": [], "next": page["next"], "cursors": {}})
+
+    responses = _json_responses({"items": [3, 4]}, {"items": [5]})
+    mocker.patch.object(spt, "_send_authorized_request", side_effect=responses)
+    merged = spt.remaining_pages(page)
+    assert merged["items"] == [1, 2, 3, 4, 5]
+    assert (merged["offset"], merged["limit"], merged["next"]) == (0, 5, None)
+    assert page["items"] == [1, 2]
+
+
+def test_remaining_pages_with_stale_total(mocker):
+    spt = Spotify(access_token="abc", populate_user_creds=False)
+    page = {
+        "items": [1, 2],
+        "limit": 2,
+        "offset": 0,
+        "total": 2,
+        "next": "https://api.spotify.com/v1/me/tracks?offset=2&limit=2",
+    }
+    send = mocker.patch.object(spt, "_send_authorized_request")
+
+    assert spt._prep__remaining_pages(page) is None
+    assert spt.remaining_pages(page) == dict(page, next=None)
+    assert send.call_count == 0
+
+
+def test_ttl_cache_skips_network_until_invalidated(mocker):
+    spt = Spotify(access_token="abc", populate_user_creds=False, cache_ttl=60)
+    responses = _json_responses({"artists": {"items": [1]}}, {}, {"artists": {}})
+    send = mocker.patch.object(spt, "_send_authorized_request", side_effect=responses)
+
+    assert spt.followed_artists() == {"artists": {"items": [1]}}
+    assert spt.followed_artists() == {"artists": {"items": [1]}}
+    assert send.call_count == 1
+
+    spt.follow_artists(A)
+    assert spt.followed_artists() == {"artists": {}}
+    assert send.call_count == 3
+
+    spt.clear_cache()
+    assert len(spt._response_cache) == 0
+
+
+def test_ttl_cache_is_disabled_by_default():
+    assert Spotify()._response_cache is None
+
+
+def test_library_and_follow_ids_are_batched(mocker):
+    spt = Spotify(access_token="abc", populate_user_creds=False)
+    artist_ids = _spotify_ids(120)
+
+    requests = spt._prep_unfollow_artists(artist_ids)
+    assert [r.method for r in requests] == ["DELETE"] * 3
+    assert "type=artist" in requests[0].url
+
+    responses = _json_responses([True] * 50, [False] * 50, [True] * 20)
+    mocker.patch.object(spt, "_send_authorized_request", side_effect=responses)
+    assert spt.follows_artists(artist_ids) == [True] * 50 + [False] * 50 + [True] * 20
+
+
+def test_recommendations_only_encodes_set_params():
+    spt = Spotify()
+    r = spt._prep_recommendations(
+        seed_genres=["rock", "pop"], target_energy=0.5, min_tempo=0, limit=10
+    )
+    assert (
+        r.url.split("?")[1]
+        == "limit=10&seed_genres=rock%2Cpop&target_energy=0.5&min_tempo=0"
+    )
+
+
+def test_me_is_requested_once_for_injected_attributes(mocker):
+    from pyfy.wrappers import _set_and_get_me_attr_sync
+
+    spt = Spotify(access_token="abc", populate_user_creds=False)
+    me = mocker.patch.object(spt, "me", return_value={"id": "u", "country": "SE"})
+    assert _set_and_get_me_attr_sync(spt, "country") == "SE"
+    assert _set_and_get_me_attr_sync(spt, "id") == "u"
+    assert me.call_count == 1
+
+
+def test_create_request_encodes_params_and_never_shares_headers():
+    spt = Spotify()
+    first = spt._create_request("GET", "https://api.spotify.com/v1/me", params={})
+    first.headers["Authorization"] = "Bearer abc"
+    second = spt._create_request(
+        "GET", "https://api.spotify.com/v1/me", params=dict(limit=1, offset=None)
+    )
+    assert second.headers == {}
+    assert second.url == "https://api.spotify.com/v1/me?limit=1"
+
+
+def test_generated_ids_methods():
+    spt = Spotify()
+    r = spt._prep_follow_users(["a", "b"])
+    assert r.method == "PUT"
+    assert r.url == "https://api.spotify.com/v1/me/following?type=user&ids=a%2Cb"
+    r = spt._prep_owns_albums(album_ids=A)
+    assert r.url == "https://api.spotify.com/v1/me/albums/contains?ids=" + A
+    assert Spotify._prep_owns_albums.__name__ == "_prep_owns_albums"
+
+
+def test_save_tracks_puts_ids():
+    spt = Spotify()
+    r = spt._prep_save_tracks([A, B])
+    assert r.method == "PUT"
+    assert r.url == "https://api.spotify.com/v1/me/tracks?ids={}%2C{}".format(A, B)
+    assert spt._prep_playback_transfer("d").json == {"device_ids": ["d"]}
+
+
+def test_library_snapshot_answers_checks_locally(mocker):
+    spt = Spotify(access_token="abc", populate_user_creds=False, library_snapshot=True)
+    responses = _json_responses(
+        {
+            "artists": {
+                "items": [{"id": A}],
+                "next": "https://api.spotify.com/v1/me/following?type=artist&after=" + A,
+            }
+        },
+        {"artists": {"items": [{"id": B}], "next": None}},
+        {},
+        [False],
+    )
+    send = mocker.patch.object(spt, "_send_authorized_request", side_effect=responses)
+
+    assert spt.follows_artists([A, C]) == [True, False]
+    assert spt.follows_artists(artist_ids=B) == [True]
+    assert send.call_count == 2
+
+    spt.unfollow_artists(A)
+    assert spt.follows_artists(A) == [False]
+    assert spt.follows_artists(A, force_network=True) == [False]
+    assert send.call_count == 4
+
+    spt.user_creds = UserCreds(access_token="other")
+    assert spt._library_snapshot == {}
+
+
+def test_library_snapshot_skips_changes_already_made(mocker):
+    spt = Spotify(access_token="abc", populate_user_creds=False, library_snapshot=True)
+    spt._library_snapshot["track"] = {A}
+    send = mocker.patch.object(
+        spt, "_send_authorized_request", side_effect=_json_responses({}, {})
+    )
+
+    assert spt.save_tracks(A) == {}
+    assert spt.delete_tracks(track_ids=[B]) == {}
+    assert send.call_count == 0
+
+    spt.save_tracks([A, B])
+    assert send.call_args[0][0].url.endswith("?ids=" + B)
+    spt.save_tracks(A, skip_if_cached=False)
+    assert send.call_count == 2
+    assert spt._library_snapshot["track"] == {A, B}
+
+
+def test_empty_json_bodies_are_not_sent():
+    spt = Spotify()
+    assert spt._prep_follow_playlist("p").json is None
+    assert spt._prep_follow_playlist("p", public=False).json == {"public": False}
+    assert spt._prep_update_playlist("p", collaborative=None).json is None
+
+
+def test_malformed_ids_raise_before_sending():
+    spt = Spotify()
+    with pytest.raises(ValueError):
+        spt._prep_tracks([A, "not-an-id"])
+    with pytest.raises(ValueError):
+        spt._prep_owns_albums(A + "," + B[1:])
+    assert len(spt._prep_follow_artists(iter(_spotify_ids(51)))) == 2
+    assert len(spt._prep_save_tracks(",".join(_spotify_ids(51)))) == 2
+    with pytest.raises(ValueError):
+        spt._prep_save_albums(None)
+    for prep in (
+        spt._prep_tracks,
+        spt._prep_artists,
+        spt._prep_albums,
+        spt._prep_tracks_audio_features,
+    ):
+        with pytest.raises(ValueError):
+            prep("a,b")
+        assert len(prep(iter(_spotify_ids(101)))) > 1
+        assert "?ids=" in prep(A + "," + B).url
+        assert prep(iter([A])).url.endswith("/" + A)
+    assert spt._prep_follows_users("not a base62 id").url.endswith("ids=not+a+base62+id")
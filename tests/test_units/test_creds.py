@@ -2,7 +2,7 @@ import datetime
 
 import pytest
 
-from pyfy import UserCreds
+from pyfy import UserCreds, ClientCreds, ALL_SCOPES
 from pyfy.creds import _Creds
 
 
@@ -61,6 +61,31 @@ def test_creds_json_loads_data_properly(user_creds_from_env):
     user_creds_from_env._delete_json()
 
 
+def test_creds_json_keeps_expiry(user_creds_from_env):
+    user_creds_from_env.expiry = datetime.datetime(2019, 1, 1, 12, 30, 5)
+    user_creds_from_env.save_as_json()
+    new_user_creds = UserCreds()
+    new_user_creds.load_from_json()
+    assert new_user_creds.expiry == user_creds_from_env.expiry
+    assert new_user_creds.access_is_expired is True
+    user_creds_from_env._delete_json()
+
+
+def test_creds_pickle_is_deprecated(user_creds_from_env):
+    with pytest.warns(DeprecationWarning):
+        user_creds_from_env.pickle()
+    with pytest.warns(DeprecationWarning):
+        UserCreds.unpickle()
+    user_creds_from_env._delete_pickle()
+
+
+def test_default_scopes_are_not_shared():
+    first, second = ClientCreds(), ClientCreds()
+    first.scopes.append("custom-scope")
+    assert "custom-scope" not in second.scopes
+    assert list(ALL_SCOPES) == second.scopes
+
+
 def test_creds_is_not_instantiable():
     with pytest.raises(TypeError):
         _Creds()
@@ -1,2 +1,126 @@
-# TODO: Test a new session is created when a new user is set
-# TODO: Test max_retries, proxies, backoff_factor, cache are set to a session
+import json
+
+import pytest
+from requests import Request, Response
+from requests.adapters import HTTPAdapter
+from cachecontrol import CacheControlAdapter
+
+from pyfy import Spotify, ApiError, UserCreds
+
+
+def test_session_adapter_mounted_on_https():
+    spt = Spotify(max_retries=3, cache=False)
+    adapter = spt._session.get_adapter("https://api.spotify.com/v1/me")
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter.max_retries.total == 3
+    assert "PUT" in adapter.max_retries.allowed_methods
+    assert 503 in adapter.max_retries.status_forcelist
+    assert adapter.max_retries.raise_on_status is False
+
+
+def test_session_cache_adapter_mounted_on_https():
+    spt = Spotify(cache=True)
+    adapter = spt._session.get_adapter("https://api.spotify.com/v1/me")
+    assert isinstance(adapter, CacheControlAdapter)
+
+
+def test_session_is_kept_when_user_changes():
+    spt = Spotify(cache=True, populate_user_creds=False)
+    session = spt._session
+    cache = session.get_adapter("https://api.spotify.com/v1/me").cache
+    cache.set("https://api.spotify.com/v1/me", b"first user")
+    spt.user_creds = UserCreds(access_token="second")
+    assert spt._session is session
+    assert cache.get("https://api.spotify.com/v1/me") is None
+
+
+def test_session_sets_default_headers():
+    spt = Spotify()
+    assert spt._session.headers["Accept"] == "application/json"
+    assert spt._session.headers["User-Agent"].startswith("pyfy/")
+
+
+def test_prepared_get_matches_session_preparation():
+    spt = Spotify()
+    r = Request(
+        method="GET",
+        url="https://api.spotify.com/v1/search?q=hey+there&type=artist",
+        headers={"Authorization": "Bearer abc"},
+    )
+    fast = spt._prepare_request(r)
+    slow = spt._session.prepare_request(r)
+    assert fast.method == slow.method
+    assert fast.url == slow.url
+    assert fast.headers == slow.headers
+    assert fast.body is None
+
+
+def test_prepared_get_template_is_not_mutated():
+    spt = Spotify()
+    spt._prepare_request(
+        Request(method="GET", url="https://api.spotify.com/v1/me", headers={"X": "1"})
+    )
+    assert "X" not in spt._prepped_templates["GET"].headers
+
+
+def test_prepared_bodyless_put_matches_session_preparation():
+    spt = Spotify()
+    r = Request(
+        method="PUT",
+        url="https://api.spotify.com/v1/me/following?type=artist&ids=a%2Cb",
+        headers={"Authorization": "Bearer abc"},
+    )
+    fast = spt._prepare_request(r)
+    slow = spt._session.prepare_request(r)
+    assert fast.method == "PUT"
+    assert fast.url == slow.url
+    assert fast.headers == slow.headers
+    assert fast.headers["Content-Length"] == "0"
+    assert spt._prepare_request(Request(method="PUT", url=r.url, json={})).body
+
+
+def _error_response(status_code, content):
+    res = Response()
+    res.status_code = status_code
+    res._content = content
+    return res
+
+
+def test_error_json_is_parsed_once(mocker):
+    spt = Spotify()
+    res = _error_response(404, b'{"error": {"status": 404, "message": "Not found"}}')
+    mocker.patch.object(spt._session, "send", return_value=res)
+    json_spy = mocker.patch("pyfy.sync_client._json_loads", wraps=json.loads)
+    with pytest.raises(ApiError) as exc:
+        spt._send_request(Request("GET", "https://api.spotify.com/v1/me"))
+    assert exc.value.msg == "Not found"
+    assert json_spy.call_count == 1
+
+
+def test_error_without_json_body(mocker):
+    spt = Spotify()
+    res = _error_response(502, b"<html>Bad gateway</html>")
+    mocker.patch.object(spt._session, "send", return_value=res)
+    with pytest.raises(ApiError):
+        spt._send_request(Request("GET", "https://api.spotify.com/v1/me"))
+
+
+def test_unrefreshed_token_stops_retrying(mocker):
+    spt = Spotify(access_token="expired", populate_user_creds=False)
+    res = _error_response(
+        401, b'{"error": {"status": 401, "message": "The access token expired"}}'
+    )
+    send = mocker.patch.object(spt._session, "send", return_value=res)
+    mocker.patch.object(spt, "_refresh_token")  # Refreshes nothing
+    with pytest.raises(RuntimeError):
+        spt._send_authorized_request(Request("GET", "https://api.spotify.com/v1/me"))
+    assert send.call_count == 1
+
+
+def test_transport_value_errors_are_not_swallowed(mocker):
+    from requests.exceptions import InvalidHeader
+
+    spt = Spotify(access_token="abc", populate_user_creds=False)
+    mocker.patch.object(spt._session, "send", side_effect=InvalidHeader("bad"))
+    with pytest.raises(InvalidHeader):
+        spt.me()
@@ -1,3 +1,8 @@
+import datetime
+from urllib import parse
+
+import pytest
+
 from pyfy.utils import (  # noqa:  F401
     _is_single_json_type,
     _safe_comma_join_list,
@@ -5,4 +10,96 @@ from pyfy.utils import (  # noqa:  F401
     _safe_query_string,
     _get_key_recursively,
     _safe_getitem,
+    _chunk_ids,
+    _merge_json_responses,
+    convert_from_iso_date,
+    _create_secret,
+    _TTLCache,
 )
+
+
+def test_chunk_ids():
+    assert _chunk_ids(["a", "b", "c"], 2) == [["a", "b"], ["c"]]
+    assert _chunk_ids(("a", "b"), 2) == [("a", "b")]
+
+
+def test_merge_json_responses():
+    assert _merge_json_responses([[True], [False, True]]) == [True, False, True]
+    assert _merge_json_responses(
+        [{"albums": [1, 2]}, {"albums": [3]}, {}]
+    ) == {"albums": [1, 2, 3]}
+
+
+def test_safe_query_string():
+    assert _safe_query_string(
+        dict(a=None, b="", c=[], d=True, e=0, f=["x", "y"], g="z")
+    ) == dict(d="true", e=0, f="x,y", g="z")
+
+
+def test_build_full_url():
+    url = "https://api.spotify.com/v1/search"
+    assert _build_full_url(url, {}) == url
+    assert _build_full_url(url, dict(q="a b", limit=None)) == url + "?q=a+b"
+    assert _build_full_url(url + "?q=a", dict(limit=2)) == url + "?q=a&limit=2"
+    assert _build_full_url(url, "q=a") == url + "?q=a"
+    assert _build_full_url(url, dict(a=1)) == url + "?a=1"
+    assert _build_full_url(url, dict(a=True)) == url + "?a=true"
+    assert _build_full_url(url, dict(a=1.0)) == url + "?a=1.0"
+    with pytest.raises(TypeError):
+        _build_full_url(url, ["q"])
+
+
+def test_convert_from_iso_date():
+    assert convert_from_iso_date("1981-12-03") == datetime.date(1981, 12, 3)
+    assert convert_from_iso_date("1981-12") == datetime.date(1981, 12, 1)
+    assert convert_from_iso_date("1981") == datetime.date(1981, 1, 1)
+
+
+def test_is_single_json_type():
+    assert _is_single_json_type("id")
+    assert _is_single_json_type(True)
+    assert _is_single_json_type(["id"])
+    assert not _is_single_json_type(["id", "id2"])
+
+
+def test_get_key_recursively():
+    response = {"tracks": {"items": [], "next": "url"}}
+    assert _get_key_recursively(response, "next", 3) == "url"
+    assert _get_key_recursively(response, "previous", 3) is None
+
+
+def test_create_secret():
+    secret = _create_secret()
+    assert secret != _create_secret()
+    assert len(secret) == 43
+    assert parse.quote(secret, safe="") == secret
+
+
+def test_ttl_cache_expires_and_evicts(mocker):
+    now = mocker.patch("pyfy.utils.time.monotonic", return_value=100)
+    cache = _TTLCache(ttl=10, maxsize=2)
+    cache.set("a", "https://api.spotify.com/v1/me", {"id": "a"})
+    cached = cache.get("a")
+    assert cached == {"id": "a"}
+    cached["id"] = "mutated"
+    assert cache.get("a") == {"id": "a"}
+
+    cache.set("b", "https://api.spotify.com/v1/me/tracks", {})
+    cache.set("c", "https://api.spotify.com/v1/me/tracks/contains?ids=1", [True])
+    assert len(cache) == 2 and cache.get("a") is None  # Least recently used
+
+    cache.invalidate("https://api.spotify.com/v1/me/tracks?ids=1")
+    assert len(cache) == 0
+
+    cache.set("a", "https://api.spotify.com/v1/me", {"id": "a"})
+    now.return_value = 110
+    assert cache.get("a") is None
+
+
+def test_safe_comma_join_list():
+    assert _safe_comma_join_list(["a", "b"]) == "a,b"
+    assert _safe_comma_join_list(("a", "b")) == "a,b"
+    assert _safe_comma_join_list(i for i in ("a", "b")) == "a,b"
+    assert _safe_comma_join_list({"a"}) == "a"
+    assert _safe_comma_join_list("a,b") == "a,b"
+    assert _safe_comma_join_list(None) is None